@@ -0,0 +1,230 @@
+"""Model scoring and the bounded executor that runs it off the event loop."""
+import asyncio
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from model_artifacts import ArtifactChanged, artifact_version, load_versioned
+
+# Rows come from the schema encoders in the model's own column order, so
+# sklearn's "fitted with feature names" warning for ndarray input is noise.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+def score(model, x, threshold):
+    """Run the estimator once and derive labels from its probabilities.
+
+    Returns ``(labels, proba, positive)``: ``proba`` is the probability of
+    each row's predicted class and ``positive`` that of the positive class
+    (binary models only), which selects the risk band. Both are None for
+    models without predict_proba.
+    """
+    if not hasattr(model, "predict_proba"):
+        return model.predict(x), None, None
+    proba = model.predict_proba(x)
+    if proba.shape[1] == 2:
+        positive = proba[:, 1]
+        idx = (positive > threshold).astype(int)
+    else:
+        positive = None
+        idx = proba.argmax(axis=1)
+    return model.classes_[idx], proba[np.arange(len(idx)), idx], positive
+
+# ---------- PROCESS WORKERS ----------
+# Each process-pool worker loads its own copy of the models at start-up and
+# loads the file again when a call names a version it does not have (after
+# a reload). Models are kept under the content hash of what was actually
+# loaded, the latest WORKER_VERSIONS per type, so a call still in flight on
+# a replaced version is scored by that version or rejected, never by its
+# successor under the old label.
+WORKER_VERSIONS = 2
+_worker_models = {}
+
+class StaleModelVersion(Exception):
+    """Raised when a call names a version that is no longer on disk."""
+
+def _remember(model_type, version, model):
+    versions = _worker_models.setdefault(model_type, {})
+    versions[version] = model
+    while len(versions) > WORKER_VERSIONS:
+        del versions[next(iter(versions))]
+
+def _init_worker(paths):
+    for model_type, path in paths.items():
+        _remember(model_type, *load_versioned(path))
+
+def _score_in_worker(model_type, path, version, x, threshold):
+    versions = _worker_models.get(model_type, {})
+    model = versions.get(version)
+    if model is None:
+        # Hashing is cheap next to loading; skip the load if the file is a version we hold
+        on_disk = artifact_version(path)
+        if on_disk not in versions:
+            try:
+                on_disk, loaded = load_versioned(path)
+            except ArtifactChanged as e:
+                raise StaleModelVersion(str(e))
+            _remember(model_type, on_disk, loaded)
+        if on_disk != version:
+            raise StaleModelVersion(f"{model_type} model {version} has been replaced by {on_disk}")
+        model = versions[version]
+    return score(model, x, threshold)
+
+# ---------- EXECUTOR ----------
+class ExecutorSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+class InferenceExecutor:
+    """Runs scoring on a dedicated thread or process pool.
+
+    At most ``max_workers + max_queue`` calls are admitted at once; further
+    calls fail fast with ExecutorSaturated instead of piling up. Each call
+    waits at most ``timeout`` seconds for its result.
+    """
+
+    def __init__(self, kind="thread", max_workers=4, max_queue=64, timeout=10.0):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            kind=os.getenv("INFERENCE_EXECUTOR", "thread"),
+            max_workers=int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            max_queue=int(os.getenv("INFERENCE_QUEUE_SIZE", "64")),
+            timeout=float(os.getenv("INFERENCE_TIMEOUT", "10")),
+        )
+
+    def start(self, paths):
+        """Start the pool; ``paths`` maps model type to its artifact path."""
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(dict(paths),),
+            )
+        else:
+            # numpy/sklearn release the GIL in their inner loops, so threads scale
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def pending(self):
+        """Number of admitted calls that have not finished yet."""
+        return self._pending
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, model_type, entry, x, threshold):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise ExecutorSaturated(f"{model_type} inference queue is full")
+            self._pending += 1
+        try:
+            if self.kind == "process":
+                future = self._pool.submit(
+                    _score_in_worker, model_type, entry.path, entry.version, x, threshold
+                )
+            else:
+                future = self._pool.submit(score, entry.model, x, threshold)
+        except BaseException:
+            self._release()
+            raise
+        # Free the slot only when the work really ends, even after a timeout
+        future.add_done_callback(self._release)
+        return future
+
+    async def score(self, model_type, entry, x, threshold):
+        """Score ``x`` with the model of ``entry`` (a registry ModelVersion)."""
+        future = self._submit(model_type, entry, x, threshold)
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def score_blocking(self, model_type, entry, x, threshold):
+        """``score`` for threads outside the event loop; raises TimeoutError after ``timeout``."""
+        return self._submit(model_type, entry, x, threshold).result(self.timeout)
+
+# ---------- MICRO-BATCHING ----------
+class MicroBatcher:
+    """Coalesces concurrent single-row requests into one predict_proba call.
+
+    Rows for the same model are collected until ``max_batch_size`` rows are
+    waiting or ``max_wait`` seconds have passed since the first one arrived,
+    then scored together on the executor. Each caller gets its own row back.
+    """
+
+    def __init__(self, executor, max_batch_size=32, max_wait=0.002):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = {}
+        self._timers = {}
+
+    @classmethod
+    def from_env(cls, executor):
+        """Return a batcher when INFERENCE_BATCH_SIZE > 1, else None."""
+        max_batch_size = int(os.getenv("INFERENCE_BATCH_SIZE", "1"))
+        if max_batch_size <= 1:
+            return None
+        max_wait = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "2")) / 1000
+        return cls(executor, max_batch_size=max_batch_size, max_wait=max_wait)
+
+    async def score(self, model_type, entry, x, threshold):
+        loop = asyncio.get_running_loop()
+        # Rows scored by different model versions never share a batch
+        key = (model_type, id(entry), threshold)
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, (model_type, entry, threshold, []))
+        batch[3].append((x, future))
+
+        if len(batch[3]) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch is not None:
+            asyncio.ensure_future(self._run(*batch))
+
+    async def _run(self, model_type, entry, threshold, items):
+        rows = [x for x, _ in items]
+        try:
+            labels, proba, positive = await self.executor.score(
+                model_type, entry, np.vstack(rows), threshold
+            )
+        except BaseException as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        start = 0
+        for x, future in items:
+            end = start + len(x)
+            if not future.done():
+                future.set_result((
+                    labels[start:end],
+                    None if proba is None else proba[start:end],
+                    None if positive is None else positive[start:end],
+                ))
+            start = end
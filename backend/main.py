@@ -1,14 +1,56 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-import numpy as np
-import joblib
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+from typing import Any
+import asyncio
+import hmac
+import json
 import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Shared helpers live next to the Next.js predictor script
+BACKEND_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BACKEND_DIR.parent / "python"))
+sys.path.insert(0, str(BACKEND_DIR))
+# Cap BLAS/OpenMP pools (INFERENCE_NUM_THREADS) before numpy loads them
+from thread_limits import configured_threads, limit_threads, thread_pools
+limit_threads()
+import metrics
+from inference import ExecutorSaturated, InferenceExecutor, MicroBatcher, StaleModelVersion
+from feature_schema import combined_form
+from model_artifacts import artifact_path
+from registry import ModelLoadError, ModelRegistry
+from request_profiler import profiler_from_env
+from risk_bands import RiskBandTable
 
 # ---------- CONFIG ----------
 # Load model paths from env vars (fall back to local files)
-ECTOPIC_MODEL_PATH = os.getenv("ECTOPIC_MODEL_PATH", "models/ectopic_pregnancy_model.pkl")
-MOLAR_MODEL_PATH = os.getenv("MOLAR_MODEL_PATH", "models/molar_pregnancy_model.pkl")
+# With MODEL_ENGINE=compiled the exported .npz next to each file is served instead
+ECTOPIC_MODEL_PATH = artifact_path(os.getenv("ECTOPIC_MODEL_PATH", "models/ectopic_pregnancy_model.pkl"))
+MOLAR_MODEL_PATH = artifact_path(os.getenv("MOLAR_MODEL_PATH", "models/molar_pregnancy_model.pkl"))
+
+# Probability above which a case is labelled positive; 0.5 matches predict()
+ECTOPIC_DECISION_THRESHOLD = float(os.getenv("ECTOPIC_DECISION_THRESHOLD", "0.5"))
+MOLAR_DECISION_THRESHOLD = float(os.getenv("MOLAR_DECISION_THRESHOLD", "0.5"))
+
+# Seconds clients are asked to wait when the inference queue is full
+INFERENCE_RETRY_AFTER = os.getenv("INFERENCE_RETRY_AFTER", "1")
+
+# Poll the model files every N seconds and reload them when they change (0 = off)
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "0"))
+# Token required by the /admin routes; they are disabled when unset
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN", "")
+
+# Synthetic predictions each model version must complete before it serves
+# (reloads) or before /health/ready reports ready (startup)
+MODEL_WARMUP_PREDICTIONS = int(os.getenv("MODEL_WARMUP_PREDICTIONS", "5"))
+# Warm-up attempts for a reloaded model before it is rejected
+MODEL_WARMUP_ATTEMPTS = int(os.getenv("MODEL_WARMUP_ATTEMPTS", "3"))
 
 # ---------- APP ----------
 app = FastAPI(title="Pregnancy Risk Expert System API")
@@ -27,6 +69,9 @@ app.add_middleware(
 )
 
 # ---------- SCHEMAS ----------
+# Request bodies are validated here, then encoded by name through the shared
+# feature schemas in python/feature_schema.py, so the column order comes from
+# the model rather than from field declaration order.
 
 # Ectopic pregnancy input schema
 class EctopicPayload(BaseModel):
@@ -63,9 +108,10 @@ class MolarPayload(BaseModel):
     passageOfVesicles: int = Field(..., ge=0, le=1)
     uterineSizeLarger: int = Field(..., ge=0, le=1)
     quantitativeHCG: float
-    bloodGroup: float
+    ageGroup: str = ""
+    bloodGroup: str
     rhStatus: int = Field(..., ge=0, le=1)
-    thyroidFunction: float
+    thyroidFunction: str
     gestationalSacPresent: int = Field(..., ge=0, le=1)
     fetalHeartbeat: int = Field(..., ge=0, le=1)
     snowstormAppearance: int = Field(..., ge=0, le=1)
@@ -73,52 +119,483 @@ class MolarPayload(BaseModel):
     assistedReproduction: int = Field(..., ge=0, le=1)
     smokingAlcohol: int = Field(..., ge=0, le=1)
 
-# Generic response
+# Both models in one request: the ectopic fields plus the molar-only ones.
+# gravidity and serumHCGLevel feed the molar gravida and quantitativeHCG.
+class CombinedPayload(EctopicPayload):
+    historyOfMolarPregnancy: int = Field(..., ge=0, le=1)
+    historyOfMiscarriages: int = Field(..., ge=0, le=1)
+    numberOfMiscarriages: float
+    excessiveNausea: int = Field(..., ge=0, le=1)
+    pelvicPain: int = Field(..., ge=0, le=1)
+    passageOfVesicles: int = Field(..., ge=0, le=1)
+    uterineSizeLarger: int = Field(..., ge=0, le=1)
+    ageGroup: str = ""
+    bloodGroup: str
+    rhStatus: int = Field(..., ge=0, le=1)
+    thyroidFunction: str
+    gestationalSacPresent: int = Field(..., ge=0, le=1)
+    fetalHeartbeat: int = Field(..., ge=0, le=1)
+    snowstormAppearance: int = Field(..., ge=0, le=1)
+    ovarianCysts: int = Field(..., ge=0, le=1)
+    assistedReproduction: int = Field(..., ge=0, le=1)
+    smokingAlcohol: int = Field(..., ge=0, le=1)
+
+# Generic response; the risk fields are set for binary models with predict_proba
 class PredictResponse(BaseModel):
     prediction: int
     proba: float | None = None
+    modelVersion: str | None = None
+    riskLevel: str | None = None
+    percentage: str | None = None
+    probability: float | None = None
+    recommendations: list[str] | None = None
+
+# Batch responses: one entry per submitted row, in submission order
+class BatchItemResult(BaseModel):
+    index: int
+    prediction: int | None = None
+    proba: float | None = None
+    error: str | None = None
+
+class BatchPredictResponse(BaseModel):
+    results: list[BatchItemResult]
+    modelVersion: str | None = None
 
 # ---------- STARTUP ----------
+# Serving model, encoder and result cache per type; swapped atomically on reload
+# Reloaded versions are warmed up before they are swapped in
+registry = ModelRegistry(
+    {"ectopic": ECTOPIC_MODEL_PATH, "molar": MOLAR_MODEL_PATH},
+    warm_up=lambda entry: warm_up(entry, attempts=MODEL_WARMUP_ATTEMPTS),
+)
+
+# Risk bands with their response fragments serialized once (ECTOPIC_RISK_BANDS / MOLAR_RISK_BANDS)
+risk_bands = {"ectopic": RiskBandTable("ectopic"), "molar": RiskBandTable("molar")}
+
+# Inference runs on its own bounded pool so bursts cannot starve other routes
+inference_executor = InferenceExecutor.from_env()
+metrics.INFERENCE_PENDING.set_function(inference_executor.pending)
+
+# Optional coalescing of concurrent single-row requests (INFERENCE_BATCH_SIZE > 1)
+micro_batcher = MicroBatcher.from_env(inference_executor)
+
+# Slow/sampled request profiles (PROFILE_SLOW_MS, PROFILE_SAMPLE_RATE); None when off
+profiler = profiler_from_env()
+
 @app.on_event("startup")
 def load_models():
-    global ectopic_model, molar_model
+    # The startup versions are warmed up afterwards, in start_warm_up
+    registry.load_all(warm_up=False)
+    inference_executor.start(registry.paths)
+    if MODEL_RELOAD_INTERVAL > 0:
+        registry.watch(MODEL_RELOAD_INTERVAL)
+
+@app.on_event("startup")
+def start_warm_up():
+    # In the background, so liveness answers while the models warm up
+    warmup_stop.clear()
+    threading.Thread(target=warm_up_serving_models, name="model-warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_inference_executor():
+    warmup_stop.set()
+    registry.stop()
+    inference_executor.shutdown()
+
+# ---------- INFERENCE ----------
+async def run_inference(model_type, entry, x, threshold, coalesce=False):
+    """Score ``x`` on the inference executor, mapping overload to HTTP errors.
+
+    With ``coalesce`` the row may be scored together with other concurrent
+    requests when micro-batching is enabled.
+    """
     try:
-        ectopic_model = joblib.load(ECTOPIC_MODEL_PATH)
-        print(f"Ectopic model loaded from: {ECTOPIC_MODEL_PATH}")
-    except Exception as e:
-        raise RuntimeError(f"Failed to load ectopic model: {e}")
+        if coalesce and micro_batcher is not None:
+            return await micro_batcher.score(model_type, entry, x, threshold)
+        return await inference_executor.score(model_type, entry, x, threshold)
+    except ExecutorSaturated as e:
+        metrics.REJECTED_TOTAL.labels(model_type, "saturated").inc()
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": INFERENCE_RETRY_AFTER}
+        )
+    except StaleModelVersion as e:
+        # The model was replaced while this request was queued; a retry gets the new one
+        metrics.REJECTED_TOTAL.labels(model_type, "stale_version").inc()
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": INFERENCE_RETRY_AFTER}
+        )
+    except asyncio.TimeoutError:
+        metrics.REJECTED_TOTAL.labels(model_type, "timeout").inc()
+        raise HTTPException(status_code=504, detail=f"{model_type} inference timed out")
+
+async def predict_one(model_type, entry, x, threshold):
+    """Score a single encoded row on ``entry``, serving repeats from its cache.
+
+    Returns ``(label, proba, positive)`` for the row; ``render_one`` turns
+    them into the response body. With the cache on, identifier columns are
+    scored at their defaults.
+    """
+    cache = entry.cache
+    key = None
+    if cache is not None:
+        key = cache.key(entry.encoder.reset_identifiers(x))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    labels, proba, positive = await run_inference(model_type, entry, x, threshold, coalesce=True)
+    scores = (
+        labels[0],
+        proba[0] if proba is not None else None,
+        positive[0] if positive is not None else None,
+    )
+    if key is not None:
+        cache.put(key, scores)
+    return scores
 
+def render_one(model_type, entry, scores):
+    """JSON text of a single-row response.
+
+    The model's cached risk-band fragment spliced with the row's
+    probabilities and the model version, so nothing is re-serialized.
+    """
+    label, proba, positive = scores
+    if positive is not None:
+        return risk_bands[model_type].render(positive, label, proba=proba, extra=entry.version_json)
+    return json.dumps({
+        "prediction": int(label),
+        "proba": float(proba) if proba is not None else None,
+        "modelVersion": entry.version,
+    })
+
+# ---------- WARM-UP ----------
+# Valid synthetic bodies; each warm-up round varies age and hCG so the
+# predictions take different paths through the trees
+WARMUP_PAYLOADS = {
+    "ectopic": (EctopicPayload, "serumHCGLevel", {
+        "age": 30, "gravidity": 2, "parity": 1, "abortions": 0,
+        "historyOfEctopicPregnancy": 0, "pelvicInflammatoryDisease": 1,
+        "tubalSurgeryHistory": 0, "infertilityTreatment": 0, "smokingStatus": 0,
+        "contraceptiveUse": 1, "lastMenstrualPeriodDays": 42, "vaginalBleeding": 1,
+        "abdominalPain": 1, "serumHCGLevel": 1500, "progesteroneLevel": 8,
+        "uterineSizeByUltrasound": 7, "adnexalMass": 1, "freeFluidInPouchOfDouglas": 0,
+    }),
+    "molar": (MolarPayload, "quantitativeHCG", {
+        "age": 30, "gravida": 2, "parity": 1, "historyOfMolarPregnancy": 0,
+        "historyOfMiscarriages": 1, "numberOfMiscarriages": 1, "vaginalBleeding": 1,
+        "excessiveNausea": 1, "pelvicPain": 0, "passageOfVesicles": 0,
+        "uterineSizeLarger": 1, "quantitativeHCG": 50000, "bloodGroup": "O+",
+        "rhStatus": 1, "thyroidFunction": "normal", "gestationalSacPresent": 0,
+        "fetalHeartbeat": 0, "snowstormAppearance": 1, "ovarianCysts": 0,
+        "assistedReproduction": 0, "smokingAlcohol": 0,
+    }),
+}
+DECISION_THRESHOLDS = {"ectopic": ECTOPIC_DECISION_THRESHOLD, "molar": MOLAR_DECISION_THRESHOLD}
+
+# Delay before retrying a failed warm-up, doubled per attempt up to the maximum
+WARMUP_RETRY_DELAY = 0.5
+WARMUP_RETRY_MAX_DELAY = 30.0
+
+# Last failure per model type while its startup warm-up is being retried
+warmup_errors = {}
+warmup_stop = threading.Event()
+
+def run_warm_up(entry):
+    """Run MODEL_WARMUP_PREDICTIONS synthetic requests for ``entry`` through
+    validation, encoding and the inference executor, bypassing the result
+    cache. Returns the timings; raises if any prediction fails.
+    """
+    model_type = entry.model_type
+    payload_cls, hcg_field, base = WARMUP_PAYLOADS[model_type]
+    latencies = []
+    for i in range(MODEL_WARMUP_PREDICTIONS):
+        start = time.perf_counter()
+        body = {**base, "age": 18 + 7 * i % 30, hcg_field: base[hcg_field] * (1 + i)}
+        x = entry.encoder.encode_batch([payload_cls.parse_obj(body).dict()])
+        labels, proba, positive = inference_executor.score_blocking(
+            model_type, entry, x, DECISION_THRESHOLDS[model_type]
+        )
+        if positive is not None:
+            risk_bands[model_type].render(positive[0], labels[0], proba=proba[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    state = {"predictions": len(latencies), "warmedAt": time.time()}
+    if latencies:
+        state["latencyMs"] = {
+            "first": latencies[0],
+            "mean": sum(latencies) / len(latencies),
+            "max": max(latencies),
+        }
+    return state
+
+def warm_up(entry, attempts=None):
+    """run_warm_up with retries and exponential backoff.
+
+    With ``attempts=None`` it retries until it succeeds, the app shuts down
+    or ``entry`` stops being the serving version.
+    """
+    delay = WARMUP_RETRY_DELAY
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return run_warm_up(entry)
+        except Exception as e:
+            if warmup_stop.is_set():
+                raise RuntimeError("Shutting down")
+            error = str(getattr(e, "detail", e)) or type(e).__name__
+            print(f"{entry.model_type.capitalize()} model {entry.version} warm-up attempt {attempt} failed: {error}", file=sys.stderr)
+            if attempts is not None and attempt >= attempts:
+                raise RuntimeError(error)
+            if attempts is None:
+                warmup_errors[entry.model_type] = error
+        if warmup_stop.wait(delay):
+            raise RuntimeError("Shutting down")
+        if attempts is None and registry.get(entry.model_type) is not entry:
+            return None
+        delay = min(delay * 2, WARMUP_RETRY_MAX_DELAY)
+
+def warm_up_serving_models():
+    """Warm up the versions loaded at startup (reloads are warmed before their swap)."""
+    for model_type in registry.paths:
+        entry = registry.get(model_type)
+        if entry.warmup is None:
+            try:
+                entry.warmup = warm_up(entry)
+            except RuntimeError:
+                return
+            warmup_errors.pop(model_type, None)
+
+# ---------- METRICS ----------
+@app.middleware("http")
+async def record_prediction_metrics(request: Request, call_next):
+    model = metrics.model_label(request.url.path)
+    if model is None:
+        return await call_next(request)
+
+    request.state.started = time.perf_counter()
+    profile = profiler.start(request.url.path) if profiler is not None else None
+    request.state.profile = profile
+    metrics.IN_FLIGHT.labels(model).inc()
+    status = "500"
     try:
-        molar_model = joblib.load(MOLAR_MODEL_PATH)
-        print(f"Molar model loaded from: {MOLAR_MODEL_PATH}")
-    except Exception as e:
-        raise RuntimeError(f"Failed to load molar model: {e}")
+        response = await call_next(request)
+        status = str(response.status_code)
+        # Handlers stamp handler_done once scoring is done; the gap is rendering
+        # the body (or response_model serialization) and sending it
+        handler_done = getattr(request.state, "handler_done", None)
+        if handler_done is not None:
+            metrics.observe_since(model, "serialization", handler_done, profile)
+        return response
+    finally:
+        metrics.IN_FLIGHT.labels(model).dec()
+        metrics.REQUESTS_TOTAL.labels(model, status).inc()
+        if profile is not None:
+            profile.finish(status=int(status))
 
 # ---------- ROUTES ----------
+# The probe, metrics and status routes only read in-memory state, so they run
+# on the event loop: sync handlers share the threadpool with batch validation
+# and would time out behind a large batch.
 @app.get("/")
-def health():
+async def health():
     return {"message": "Pregnancy Risk Expert System API is running"}
 
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving; says nothing about the models."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """200 once every model's serving version has completed its warm-up, else 503."""
+    models = {}
+    for model_type in registry.paths:
+        entry = registry.get(model_type)
+        models[model_type] = {**entry.describe(), "warmup": entry.warmup}
+        if entry.warmup is None and model_type in warmup_errors:
+            models[model_type]["warmupError"] = warmup_errors[model_type]
+    ready = all(model["warmup"] is not None for model in models.values())
+    body = {
+        "ready": ready,
+        "models": models,
+        "threads": {"limit": configured_threads(), "pools": thread_pools()},
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        model_type: entry.cache.stats() if entry.cache else None
+        for model_type, entry in ((t, registry.get(t)) for t in registry.paths)
+    }
+
+@app.get("/models")
+async def model_versions():
+    return registry.versions()
+
+# ---------- ADMIN ----------
+def require_admin(token):
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(token or "", MODEL_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/models/{model_type}/reload")
+async def reload_model(model_type: str, x_admin_token: str | None = Header(default=None)):
+    """Reload the configured artifact for ``model_type`` and swap it in.
+
+    Loading, the schema check and the warm-up run in a worker thread; requests
+    keep being served by the current version until the swap.
+    """
+    require_admin(x_admin_token)
+    if model_type not in registry.paths:
+        raise HTTPException(status_code=404, detail=f"Unknown model type: {model_type}")
+    try:
+        entry = await run_in_threadpool(registry.load, model_type)
+    except ModelLoadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {model_type: {**entry.describe(), "warmup": entry.warmup}}
+
 @app.post("/predict/ectopic", response_model=PredictResponse)
-def predict_ectopic(payload: EctopicPayload):
+async def predict_ectopic(payload: EctopicPayload, request: Request):
+    # Request body parsing and pydantic validation happen before the handler runs
+    profile = request.state.profile
+    metrics.observe_since("ectopic", "validation", request.state.started, profile)
+    # One snapshot per request: a concurrent reload does not affect it
+    entry = registry.get("ectopic")
     try:
-        x = np.array([[v for v in payload.dict().values()]])
-        y_pred = ectopic_model.predict(x)[0]
-        proba = None
-        if hasattr(ectopic_model, "predict_proba"):
-            proba = float(ectopic_model.predict_proba(x)[0, int(y_pred)])
-        return {"prediction": int(y_pred), "proba": proba}
+        with metrics.stage("ectopic", "encoding", profile):
+            x = entry.encoder.encode_batch([payload.dict()])
+        with metrics.stage("ectopic", "inference", profile):
+            scores = await predict_one("ectopic", entry, x, ECTOPIC_DECISION_THRESHOLD)
+        request.state.handler_done = time.perf_counter()
+        return Response(content=render_one("ectopic", entry, scores), media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/predict/molar", response_model=PredictResponse)
-def predict_molar(payload: MolarPayload):
+async def predict_molar(payload: MolarPayload, request: Request):
+    # Request body parsing and pydantic validation happen before the handler runs
+    profile = request.state.profile
+    metrics.observe_since("molar", "validation", request.state.started, profile)
+    # One snapshot per request: a concurrent reload does not affect it
+    entry = registry.get("molar")
+    try:
+        with metrics.stage("molar", "encoding", profile):
+            x = entry.encoder.encode_batch([payload.dict()])
+        with metrics.stage("molar", "inference", profile):
+            scores = await predict_one("molar", entry, x, MOLAR_DECISION_THRESHOLD)
+        request.state.handler_done = time.perf_counter()
+        return Response(content=render_one("molar", entry, scores), media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/predict/combined")
+async def predict_combined(payload: CombinedPayload, request: Request):
+    """Ectopic and molar assessment of one patient.
+
+    The body is validated and normalized once; both models then score it
+    concurrently and the response is ``{"ectopic": {...}, "molar": {...}}``.
+    """
+    profile = request.state.profile
+    metrics.observe_since("combined", "validation", request.state.started, profile)
+    ectopic, molar = registry.get("ectopic"), registry.get("molar")
+    try:
+        with metrics.stage("combined", "encoding", profile):
+            form = combined_form(payload.dict())
+            x_ectopic = ectopic.encoder.encode_batch([form])
+            x_molar = molar.encoder.encode_batch([form])
+        with metrics.stage("combined", "inference", profile):
+            ectopic_scores, molar_scores = await asyncio.gather(
+                predict_one("ectopic", ectopic, x_ectopic, ECTOPIC_DECISION_THRESHOLD),
+                predict_one("molar", molar, x_molar, MOLAR_DECISION_THRESHOLD),
+            )
+        request.state.handler_done = time.perf_counter()
+        body = (
+            '{"ectopic": ' + render_one("ectopic", ectopic, ectopic_scores)
+            + ', "molar": ' + render_one("molar", molar, molar_scores) + '}'
+        )
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ---------- BATCH ----------
+def validate_batch(model_type, payload_cls, encoder, rows, profile=None):
+    """Validate rows independently; returns (results, valid_indices, features).
+
+    Rows that fail the payload schema or encode to a non-finite value
+    (e.g. ``1e999``) get an error entry instead of failing the batch.
+    """
+    results = [None] * len(rows)
+    parsed_indices = []
+    features = []
+    with metrics.stage(model_type, "validation", profile):
+        for i, row in enumerate(rows):
+            try:
+                payload = payload_cls.parse_obj(row)
+            except ValidationError as e:
+                results[i] = {"index": i, "error": str(e)}
+                continue
+            parsed_indices.append(i)
+            features.append(payload.dict())
+    with metrics.stage(model_type, "encoding", profile):
+        x, encoded, errors = encoder.encode_many(features)
+    for position, message in errors.items():
+        i = parsed_indices[position]
+        results[i] = {"index": i, "error": message}
+    return results, [parsed_indices[position] for position in encoded], x
+
+async def predict_batch(model_type, payload_cls, rows, threshold, profile=None):
+    """Validate each row independently, then score all valid rows in one call."""
+    entry = registry.get(model_type)
+    # Validating thousands of rows is CPU work; keep it off the event loop
+    results, valid_indices, x = await run_in_threadpool(
+        validate_batch, model_type, payload_cls, entry.encoder, rows, profile
+    )
+
+    if valid_indices:
+        with metrics.stage(model_type, "inference", profile):
+            labels, proba, _ = await run_inference(model_type, entry, x, threshold)
+        for row_idx, i in enumerate(valid_indices):
+            results[i] = {
+                "index": i,
+                "prediction": int(labels[row_idx]),
+                "proba": float(proba[row_idx]) if proba is not None else None,
+            }
+    return {"results": results, "modelVersion": entry.version}
+
+@app.post("/predict/ectopic/batch", response_model=BatchPredictResponse)
+async def predict_ectopic_batch(rows: list[Any], request: Request):
+    try:
+        result = await predict_batch(
+            "ectopic", EctopicPayload, rows, ECTOPIC_DECISION_THRESHOLD, request.state.profile
+        )
+        request.state.handler_done = time.perf_counter()
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/predict/molar/batch", response_model=BatchPredictResponse)
+async def predict_molar_batch(rows: list[Any], request: Request):
     try:
-        x = np.array([[v for v in payload.dict().values()]])
-        y_pred = molar_model.predict(x)[0]
-        proba = None
-        if hasattr(molar_model, "predict_proba"):
-            proba = float(molar_model.predict_proba(x)[0, int(y_pred)])
-        return {"prediction": int(y_pred), "proba": proba}
+        result = await predict_batch(
+            "molar", MolarPayload, rows, MOLAR_DECISION_THRESHOLD, request.state.profile
+        )
+        request.state.handler_done = time.perf_counter()
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,90 @@
+"""Prometheus metrics for the prediction API."""
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Sub-millisecond buckets: most stages of a single prediction are well under 10ms
+STAGE_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "prediction_stage_seconds",
+    "Time spent in each stage of a prediction request",
+    ["model", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+REQUESTS_TOTAL = Counter(
+    "prediction_requests_total",
+    "Prediction requests by model and HTTP status",
+    ["model", "status"],
+)
+IN_FLIGHT = Gauge(
+    "prediction_requests_in_flight",
+    "Prediction requests currently being processed",
+    ["model"],
+)
+INFERENCE_PENDING = Gauge(
+    "inference_pending",
+    "Inference calls running or queued on the inference executor",
+)
+REJECTED_TOTAL = Counter(
+    "prediction_rejected_total",
+    "Prediction requests rejected: executor saturated, timed out or model version replaced",
+    ["model", "reason"],
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "model_load_seconds",
+    "Time taken to load the model artifact",
+    ["model"],
+)
+MODEL_SIZE_BYTES = Gauge(
+    "model_size_bytes",
+    "Size of the model artifact on disk",
+    ["model"],
+)
+MODEL_VERSION_INFO = Gauge(
+    "model_version_info",
+    "Artifact version currently serving each model (value is always 1)",
+    ["model", "version"],
+)
+MODEL_RELOADS_TOTAL = Counter(
+    "model_reloads_total",
+    "Model reload attempts by outcome (loaded, rejected)",
+    ["model", "outcome"],
+)
+
+# Label values for /predict/<model> routes; anything else under /predict is
+# "unknown", so clients cannot create label sets by requesting made-up paths
+MODEL_LABELS = ("ectopic", "molar", "combined")
+
+def model_label(path):
+    """Return the model label for /predict/<model>[/...] paths, else None."""
+    parts = path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "predict":
+        return parts[1] if parts[1] in MODEL_LABELS else "unknown"
+    return None
+
+@contextmanager
+def stage(model, name, profile=None):
+    """Time a stage into the histogram and, when given, the request's profile."""
+    start = time.perf_counter()
+    try:
+        if profile is None:
+            yield
+        else:
+            with profile.stage(name):
+                yield
+    finally:
+        STAGE_SECONDS.labels(model, name).observe(time.perf_counter() - start)
+
+def observe_since(model, name, start, profile=None):
+    STAGE_SECONDS.labels(model, name).observe(time.perf_counter() - start)
+    if profile is not None:
+        profile.checkpoint(name)
+
+def render():
+    """Return (body, content_type) for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,172 @@
+"""Live model per type, replaced atomically when a new artifact is loaded."""
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import metrics
+from feature_schema import SchemaMismatch, compile_encoder
+from inference import score
+from model_artifacts import load_versioned
+from prediction_cache import cache_from_env, file_signature
+from thread_limits import configured_threads
+
+class ModelLoadError(RuntimeError):
+    """Raised when an artifact fails to load, its schema check or its warm-up."""
+
+class ModelVersion:
+    """One loaded artifact with everything a request needs to score against it.
+
+    Handlers take a reference once per request, so a reload never swaps the
+    model, encoder or cache out from under a request in flight.
+    """
+
+    def __init__(self, model_type, path, model, encoder, version, signature):
+        self.model_type = model_type
+        self.path = str(path)
+        self.model = model
+        self.encoder = encoder
+        self.version = version
+        self.signature = signature
+        self.loaded_at = time.time()
+        # Results are cached per version, so a swap starts from an empty cache
+        self.cache = cache_from_env()
+        # Pre-serialized member spliced into JSON responses
+        self.version_json = f', "modelVersion": {json.dumps(version)}'
+        # Warm-up timings, set once this version has completed its warm-up
+        self.warmup = None
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "loadedAt": self.loaded_at,
+            "features": len(self.encoder.feature_names),
+        }
+
+class ModelRegistry:
+    """Holds the serving ModelVersion per model type.
+
+    ``load`` builds a new version off to the side (load, schema check,
+    warm-up prediction, then the ``warm_up`` hook if given) and only then
+    replaces the current one, in a single dict assignment. A failed load
+    leaves the serving version untouched. ``watch`` polls the artifact
+    files and reloads them when they change.
+    """
+
+    def __init__(self, paths, warm_up=None):
+        self.paths = {model_type: str(path) for model_type, path in paths.items()}
+        # Called with each new ModelVersion before it serves; returns its warm-up timings
+        self.warm_up = warm_up
+        self._current = {}
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def get(self, model_type):
+        return self._current[model_type]
+
+    def versions(self):
+        return {model_type: entry.describe() for model_type, entry in self._current.items()}
+
+    def load_all(self, warm_up=True):
+        for model_type in self.paths:
+            self.load(model_type, warm_up=warm_up)
+
+    def load(self, model_type, path=None, warm_up=True):
+        """Load ``path`` (default: the configured artifact) and swap it in.
+
+        Returns the new ModelVersion; raises ModelLoadError and keeps the
+        current version if the artifact is unusable or fails its warm-up.
+        With ``warm_up=False`` the hook is skipped and the caller warms the
+        version up after the swap.
+        """
+        path = str(path or self.paths[model_type])
+        with self._reload_lock:
+            try:
+                entry = self._build(model_type, path)
+                if warm_up and self.warm_up is not None:
+                    try:
+                        entry.warmup = self.warm_up(entry)
+                    except Exception as e:
+                        raise ModelLoadError(f"{model_type} model failed its warm-up: {e}")
+            except ModelLoadError as e:
+                metrics.MODEL_RELOADS_TOTAL.labels(model_type, "rejected").inc()
+                print(f"Keeping current {model_type} model: {e}", file=sys.stderr)
+                raise
+            previous = self._current.get(model_type)
+            self._current[model_type] = entry
+            self.paths[model_type] = path
+
+        if previous is not None and previous.version != entry.version:
+            metrics.MODEL_VERSION_INFO.remove(model_type, previous.version)
+        metrics.MODEL_VERSION_INFO.labels(model_type, entry.version).set(1)
+        metrics.MODEL_RELOADS_TOTAL.labels(model_type, "loaded").inc()
+        print(f"{model_type.capitalize()} model {entry.version} loaded from: {path}")
+        return entry
+
+    def _build(self, model_type, path):
+        start = time.perf_counter()
+        signature = file_signature(path)
+        try:
+            version, model = load_versioned(path)
+        except Exception as e:
+            raise ModelLoadError(f"Failed to load {model_type} model: {e}")
+        threads = configured_threads()
+        if threads is not None and getattr(model, "n_jobs", None) not in (None, 1):
+            # A model saved with n_jobs=-1 would start a pool of every core per call
+            model.n_jobs = threads
+        try:
+            encoder = compile_encoder(model_type, model=model)
+        except SchemaMismatch as e:
+            raise ModelLoadError(f"{model_type} model does not match its feature schema: {e}")
+        try:
+            # The first call pays for lazy allocations; keep that off a real request
+            score(model, np.zeros((1, len(encoder.feature_names))), 0.5)
+        except Exception as e:
+            raise ModelLoadError(f"{model_type} model failed its warm-up prediction: {e}")
+        metrics.MODEL_LOAD_SECONDS.labels(model_type).set(time.perf_counter() - start)
+        metrics.MODEL_SIZE_BYTES.labels(model_type).set(os.path.getsize(path))
+        return ModelVersion(model_type, path, model, encoder, version, signature)
+
+    # ---------- FILE WATCH ----------
+    def watch(self, interval):
+        """Reload an artifact after its file changes, polling every ``interval`` seconds.
+
+        A change is acted on once the file has been stable for one interval,
+        so a partially written artifact is not picked up.
+        """
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch_loop(self, interval):
+        seen = {}
+        rejected = {}
+        while not self._stop.wait(interval):
+            for model_type, path in list(self.paths.items()):
+                signature = file_signature(path)
+                entry = self._current.get(model_type)
+                if signature is None or entry is None or signature == entry.signature:
+                    continue
+                if seen.get(model_type) != signature:
+                    seen[model_type] = signature
+                    continue
+                if rejected.get(model_type) == signature:
+                    continue
+                try:
+                    self.load(model_type)
+                except ModelLoadError:
+                    rejected[model_type] = signature
@@ -0,0 +1,84 @@
+"""sklearn estimator versus the exported NumPy-only engine.
+
+Trains the stand-in models, exports them with ``compiled_model.py``, checks
+probability and label parity on probe rows and on schema-encoded sample
+forms, then reports single-row and batch latency for both engines and the
+cold-start time of the per-request predictor with each.
+
+Usage: python benchmarks/bench_compiled_engine.py [--repeat N] [--batch-size N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import ROOT, SAMPLE_FORMS, build_models_dir, summarize, time_per_call
+from compiled_model import check_parity, load_compiled, save_compiled
+from model_artifacts import artifact_path, load_model
+from model_predictor import MODEL_FILES, create_predictor
+
+SCRIPT = ROOT / "python" / "model_predictor.py"
+
+
+def cold_start_ms(model_type, engine, models_dir, runs):
+    env = {**os.environ, "PREDICTOR_MODELS_DIR": str(models_dir), "MODEL_ENGINE": engine}
+    argv = [sys.executable, str(SCRIPT), model_type, json.dumps(SAMPLE_FORMS[model_type])]
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, capture_output=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(np.array(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per engine")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-models-") as tmp_dir:
+        models_dir = build_models_dir(tmp_dir)
+        report = {}
+        for model_type, filename in MODEL_FILES.items():
+            path = models_dir / filename
+            model = load_model(path, mmap_mode=None)
+            compiled_path = artifact_path(path, "compiled")
+            save_compiled(model, compiled_path)
+            compiled = load_compiled(compiled_path)
+
+            # Parity on encoded sample forms as well as on the probe rows
+            encoder = create_predictor(model_type, models_dir).encoder
+            forms = [{**SAMPLE_FORMS[model_type], "age": 18 + i % 30} for i in range(args.batch_size)]
+            x_batch = encoder.encode_batch(forms)
+            max_diff = max(check_parity(model, compiled), check_parity(model, compiled, x_batch))
+            x_one = x_batch[:1]
+
+            report[model_type] = {
+                "max_probability_diff": max_diff,
+                "artifact_bytes": {"sklearn": path.stat().st_size, "compiled": compiled_path.stat().st_size},
+                "single_row": {
+                    "sklearn": summarize(time_per_call(lambda: model.predict_proba(x_one), args.repeat)),
+                    "compiled": summarize(time_per_call(lambda: compiled.predict_proba(x_one), args.repeat)),
+                },
+                "batch": {
+                    "sklearn": summarize(time_per_call(lambda: model.predict_proba(x_batch), 20)),
+                    "compiled": summarize(time_per_call(lambda: compiled.predict_proba(x_batch), 20)),
+                },
+                "cold_start": {
+                    engine: cold_start_ms(model_type, engine, models_dir, args.runs)
+                    for engine in ("sklearn", "compiled")
+                },
+            }
+
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Throughput and tail latency of /predict/<model> with and without micro-batching.
+
+Drives the FastAPI app in-process (httpx ASGI transport, no network) with a
+fixed number of concurrent clients and reports requests/second and latency
+percentiles for each batching configuration.
+
+Usage: python benchmarks/bench_microbatch.py [--requests N] [--concurrency C]
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from common import SAMPLE_PAYLOADS, build_backend_models, summarize
+
+# (max batch size, max wait in ms); size 1 disables batching
+CONFIGS = [(1, 0), (8, 1), (16, 2), (32, 5)]
+
+
+async def drive(app, model_type, n_requests, concurrency):
+    import httpx
+
+    payload = SAMPLE_PAYLOADS[model_type]
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(n_requests):
+        queue.put_nowait({**payload, "age": 18 + i % 30})
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                body = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.post(f"/predict/{model_type}", json=body)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return n_requests / elapsed, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-models-") as tmp_dir:
+        paths = build_backend_models(tmp_dir)
+        os.environ["ECTOPIC_MODEL_PATH"] = str(paths["ectopic"])
+        os.environ["MOLAR_MODEL_PATH"] = str(paths["molar"])
+        # Measure inference, not the cache, and never shed load
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+        os.environ["INFERENCE_QUEUE_SIZE"] = str(args.requests)
+
+        import main as backend
+        from inference import MicroBatcher
+
+        backend.load_models()
+        results = {}
+        try:
+            for model_type in ("ectopic", "molar"):
+                for batch_size, wait_ms in CONFIGS:
+                    backend.micro_batcher = (
+                        MicroBatcher(backend.inference_executor, batch_size, wait_ms / 1000)
+                        if batch_size > 1 else None
+                    )
+                    throughput, latencies = asyncio.run(
+                        drive(backend.app, model_type, args.requests, args.concurrency)
+                    )
+                    results.setdefault(model_type, []).append({
+                        "batch_size": batch_size,
+                        "wait_ms": wait_ms,
+                        "requests_per_second": throughput,
+                        **summarize(latencies),
+                    })
+        finally:
+            backend.inference_executor.shutdown()
+
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Startup time and per-worker memory for the regular and memory-mapped loaders.
+
+Starts several worker processes at once, each loading the same artifact,
+and reports per worker: load time, resident memory added by the load (RSS)
+and proportional set size (PSS, which divides shared pages between the
+processes mapping them). Linux only (/proc).
+
+Usage: python benchmarks/bench_model_loading.py [--workers N] [--estimator forest|logistic]
+"""
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import common  # noqa: F401  (puts python/ on sys.path)
+from model_artifacts import load_model, save_mmap_artifact
+
+
+def memory_kb():
+    """Return (rss_kb, pss_kb) for the current process."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values["Rss"], values["Pss"]
+
+
+def worker(path, mmap_mode, barrier, results):
+    import sklearn.ensemble  # noqa: F401  (import cost is not part of the load)
+
+    rss_before, _ = memory_kb()
+    start = time.perf_counter()
+    model = load_model(path, mmap_mode=mmap_mode)
+    load_seconds = time.perf_counter() - start
+    model.predict_proba(np.zeros((1, model.n_features_in_)))
+    # Measure while every worker still has the model mapped
+    barrier.wait()
+    rss_after, pss = memory_kb()
+    results.put({"load_ms": load_seconds * 1000, "rss_delta_kb": rss_after - rss_before, "pss_kb": pss})
+    barrier.wait()
+
+
+def build_model(kind, n_features=35):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    x = rng.random((20000, n_features))
+    y = rng.integers(0, 2, len(x))
+    if kind == "logistic":
+        return LogisticRegression(max_iter=200).fit(x, y)
+    return RandomForestClassifier(n_estimators=300, random_state=0).fit(x, y)
+
+
+def measure(path, mmap_mode, n_workers):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, mmap_mode, barrier, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return {key: float(np.mean([r[key] for r in rows])) for key in rows[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--estimator", choices=["forest", "logistic"], default="forest")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-artifacts-") as tmp_dir:
+        path = Path(tmp_dir) / "model.joblib"
+        save_mmap_artifact(build_model(args.estimator), path)
+
+        report = {
+            "estimator": args.estimator,
+            "workers": args.workers,
+            "artifact_bytes": path.stat().st_size,
+            "regular": measure(path, None, args.workers),
+            "mmap": measure(path, "r", args.workers),
+        }
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Per-request latency of predict + predict_proba versus ``inference.score``.
+
+The "before" case is the sequence the handlers used to run; the "after"
+case calls the backend's own ``inference.score``, which derives the label
+from a single predict_proba call.
+
+Usage: python benchmarks/bench_single_pass.py [--repeat N]
+"""
+import argparse
+import functools
+import json
+
+import numpy as np
+
+from common import default_feature_names, summarize, time_per_call, train_stand_in_model
+from inference import score
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--estimators", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    for model_type in ("ectopic", "molar"):
+        feature_names = default_feature_names(model_type)
+        model = train_stand_in_model(feature_names, n_estimators=args.estimators)
+        x = np.random.default_rng(1).random((1, len(feature_names)))
+
+        def two_pass():
+            y_pred = model.predict(x)[0]
+            return y_pred, model.predict_proba(x)[0, int(y_pred)]
+
+        single_pass = functools.partial(score, model, x, 0.5)
+
+        labels, proba, _ = single_pass()
+        assert two_pass() == (labels[0], proba[0])
+        before = summarize(time_per_call(two_pass, args.repeat))
+        after = summarize(time_per_call(single_pass, args.repeat))
+        results[model_type] = {
+            "predict_plus_proba": before,
+            "inference_score": after,
+            "speedup": before["mean_ms"] / after["mean_ms"],
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
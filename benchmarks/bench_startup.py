@@ -0,0 +1,64 @@
+"""Cold-start cost of the one-process-per-request predictor the Next.js routes spawn.
+
+For each invocation (ectopic, molar and an invalid model type) runs
+``python/model_predictor.py`` in a fresh interpreter several times and
+reports wall-clock latency, plus the import / model-load breakdown from
+``--self-test``.
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import ROOT, SAMPLE_FORMS, build_models_dir, summarize
+
+SCRIPT = ROOT / "python" / "model_predictor.py"
+
+
+def run(args, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, str(SCRIPT), *args], env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, proc
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-models-") as tmp_dir:
+        models_dir = build_models_dir(tmp_dir)
+        env = {**os.environ, "PREDICTOR_MODELS_DIR": str(models_dir), "PYTHONUNBUFFERED": "1"}
+
+        invocations = {
+            "ectopic": ["ectopic", json.dumps(SAMPLE_FORMS["ectopic"])],
+            "molar": ["molar", json.dumps(SAMPLE_FORMS["molar"])],
+            "invalid": ["unknown", "{}"],
+        }
+        report = {}
+        for name, argv in invocations.items():
+            samples = []
+            for _ in range(args.runs):
+                elapsed, proc = run(argv, env)
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                if name != "invalid" and "error" in result:
+                    raise SystemExit(f"{name} prediction failed: {result['error']}")
+                samples.append(elapsed)
+            report[name] = {"wall": summarize(np.array(samples))}
+            if name != "invalid":
+                _, proc = run(["--self-test", name], env)
+                report[name]["self_test"] = json.loads(proc.stdout)[name]
+
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
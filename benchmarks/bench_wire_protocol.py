@@ -0,0 +1,87 @@
+"""JSON-lines worker versus the binary worker protocol.
+
+Starts ``model_predictor.py worker`` and ``worker --binary`` over pipes and
+measures sequential round-trip latency for one record as a JSON-lines
+request, a binary-framed JSON form and a pre-encoded float32 feature
+vector, plus the throughput of a pipelined batch of feature vectors in a
+single frame. Client-side encoding and decoding are included.
+
+Usage: python benchmarks/bench_wire_protocol.py [--repeat N] [--batch-size N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from common import ROOT, SAMPLE_FORMS, build_models_dir, summarize, time_per_call
+from model_predictor import create_predictor
+from wire_protocol import OP_FORM, decode_response, encode_features_request, encode_request, read_frame
+
+SCRIPT = ROOT / "python" / "model_predictor.py"
+MODEL_IDS = {"ectopic": 0, "molar": 1}
+
+
+def start_worker(env, *flags):
+    return subprocess.Popen(
+        [sys.executable, str(SCRIPT), "worker", "--threads", "1", *flags],
+        env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-models-") as tmp_dir:
+        models_dir = build_models_dir(tmp_dir)
+        env = {**os.environ, "PREDICTOR_MODELS_DIR": str(models_dir), "PREDICTION_CACHE_SIZE": "0"}
+        text_worker = start_worker(env)
+        binary_worker = start_worker(env, "--binary")
+
+        report = {}
+        try:
+            for model_type, model_id in MODEL_IDS.items():
+                form = SAMPLE_FORMS[model_type]
+                features = create_predictor(model_type, models_dir).encode_features(form)
+                batch = np.repeat(features, args.batch_size, axis=0)
+
+                def json_lines():
+                    text_worker.stdin.write(json.dumps({"id": 1, "model": model_type, "data": form}).encode() + b"\n")
+                    text_worker.stdin.flush()
+                    return json.loads(text_worker.stdout.readline())
+
+                def binary_call(request):
+                    binary_worker.stdin.write(request)
+                    binary_worker.stdin.flush()
+                    return decode_response(read_frame(binary_worker.stdout))
+
+                report[model_type] = {
+                    "json_lines_ms": summarize(time_per_call(json_lines, args.repeat)),
+                    "binary_form_ms": summarize(time_per_call(
+                        lambda: binary_call(encode_request(1, OP_FORM, model_id, json.dumps(form).encode())),
+                        args.repeat,
+                    )),
+                    "binary_features_ms": summarize(time_per_call(
+                        lambda: binary_call(encode_features_request(1, model_id, features)), args.repeat
+                    )),
+                }
+                batch_ms = np.median(time_per_call(
+                    lambda: binary_call(encode_features_request(1, model_id, batch)), 20
+                ))
+                report[model_type]["binary_features_batch_rows_per_s"] = args.batch_size / (batch_ms / 1000)
+        finally:
+            for worker in (text_worker, binary_worker):
+                worker.stdin.close()
+                worker.wait()
+
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
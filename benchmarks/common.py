@@ -0,0 +1,132 @@
+"""Shared helpers for the benchmarks: stand-in models and timing utilities.
+
+The real model artifacts are not checked in, so every benchmark trains small
+random forests on synthetic data using the real ectopic and molar feature
+layouts. Absolute numbers therefore differ from production, but relative
+comparisons between code paths hold.
+"""
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python"))
+sys.path.insert(0, str(ROOT / "backend"))
+
+from model_predictor import EctopicPregnancyPredictor, MolarPregnancyPredictor  # noqa: E402
+
+PREDICTOR_CLASSES = {
+    "ectopic": EctopicPregnancyPredictor,
+    "molar": MolarPregnancyPredictor,
+}
+
+# Sample form data in the shape the Next.js routes send
+SAMPLE_FORMS = {
+    "ectopic": {
+        "PatientID": 1, "age": 31, "gravidity": 2, "parity": 1, "abortions": 0,
+        "ectopicPregnancyHistory": "no", "pelvicInflammatoryDisease": "yes",
+        "tubalSurgeryHistory": "no", "infertilityTreatment": "no",
+        "smokingStatus": "no", "contraceptiveUse": "yes",
+        "lastMenstrualPeriodDays": 42, "vaginalBleeding": "yes",
+        "abdominalPain": "yes", "serumHCGLevel": 1800, "progesteroneLevel": 8,
+        "uterineSizeByUltrasound": 7, "adnexalMass": "yes",
+        "freeFluidInPouchOfDouglas": "no",
+    },
+    "molar": {
+        "PatientID": 1, "age": 24, "ageGroup": "20-35", "gravida": 2, "parity": 1,
+        "historyOfMolarPregnancy": "no", "historyOfMiscarriages": "yes",
+        "numberOfMiscarriages": 1, "vaginalBleeding": "yes",
+        "excessiveNausea": "yes", "pelvicPain": "no", "passageOfVesicles": "no",
+        "uterineSizeLarger": "yes", "quantitativeHCG": 150000, "bloodGroup": "O+",
+        "rhStatus": "positive", "thyroidFunction": "normal",
+        "gestationalSacPresent": "no", "fetalHeartbeat": "no",
+        "snowstormAppearance": "yes", "ovarianCysts": "no",
+        "assistedReproduction": "no", "smokingAlcohol": "no",
+    },
+}
+
+
+def default_feature_names(model_type):
+    return list(PREDICTOR_CLASSES[model_type].DEFAULT_FEATURE_NAMES)
+
+
+def train_stand_in_model(feature_names, n_samples=500, n_estimators=100, seed=0):
+    rng = np.random.default_rng(seed)
+    x = pd.DataFrame(rng.random((n_samples, len(feature_names))), columns=feature_names)
+    y = rng.integers(0, 2, n_samples)
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(x, y)
+
+
+def build_models_dir(target_dir, n_estimators=100):
+    """Write stand-in ectopic/molar artifacts to ``target_dir`` and return it."""
+    from model_predictor import MODEL_FILES
+
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    for model_type, filename in MODEL_FILES.items():
+        model = train_stand_in_model(default_feature_names(model_type), n_estimators=n_estimators)
+        joblib.dump(model, target_dir / filename)
+    return target_dir
+
+
+def build_backend_models(target_dir, n_estimators=100):
+    """Write stand-in models for backend/main.py and return their paths.
+
+    Point ECTOPIC_MODEL_PATH and MOLAR_MODEL_PATH at them before importing
+    ``main``.
+    """
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for model_type in PREDICTOR_CLASSES:
+        model = train_stand_in_model(default_feature_names(model_type), n_estimators=n_estimators)
+        paths[model_type] = target_dir / f"{model_type}_backend_model.pkl"
+        joblib.dump(model, paths[model_type])
+    return paths
+
+
+# Sample JSON bodies for the FastAPI routes
+SAMPLE_PAYLOADS = {
+    "ectopic": {
+        "age": 31, "gravidity": 2, "parity": 1, "abortions": 0,
+        "historyOfEctopicPregnancy": 0, "pelvicInflammatoryDisease": 1,
+        "tubalSurgeryHistory": 0, "infertilityTreatment": 0, "smokingStatus": 0,
+        "contraceptiveUse": 1, "lastMenstrualPeriodDays": 42, "vaginalBleeding": 1,
+        "abdominalPain": 1, "serumHCGLevel": 1800, "progesteroneLevel": 8,
+        "uterineSizeByUltrasound": 7, "adnexalMass": 1, "freeFluidInPouchOfDouglas": 0,
+    },
+    "molar": {
+        "age": 24, "gravida": 2, "parity": 1, "historyOfMolarPregnancy": 0,
+        "historyOfMiscarriages": 1, "numberOfMiscarriages": 1, "vaginalBleeding": 1,
+        "excessiveNausea": 1, "pelvicPain": 0, "passageOfVesicles": 0,
+        "uterineSizeLarger": 1, "quantitativeHCG": 150000, "bloodGroup": "O+",
+        "rhStatus": 1, "thyroidFunction": "normal", "gestationalSacPresent": 0,
+        "fetalHeartbeat": 0, "snowstormAppearance": 1, "ovarianCysts": 0,
+        "assistedReproduction": 0, "smokingAlcohol": 0,
+    },
+}
+
+
+def time_per_call(fn, repeat=200, warmup=10):
+    """Return per-call latencies in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.array(samples)
+
+
+def summarize(samples):
+    return {
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+    }
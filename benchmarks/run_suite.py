@@ -0,0 +1,306 @@
+"""Baseline benchmark suite for both serving paths.
+
+Measures, for the ectopic and molar models:
+
+* ``predictor/<model>/...`` -- ``python/model_predictor.py`` as the Next.js
+  routes use it: preprocessing (``encode_features``), inference
+  (``predict_proba`` on the encoded row), a single in-process request
+  (``predict_json``), a single request through a fresh subprocess, and
+  batch throughput (``predict_many``).
+* ``backend/<model>/...`` -- ``backend/main.py``: preprocessing (pydantic
+  validation plus schema encoding), inference (``inference.score``), a
+  single ``POST /predict/<model>`` and batch throughput through
+  ``POST /predict/<model>/batch``, both driven in-process over httpx's ASGI
+  transport.
+
+Stand-in models are trained with fixed seeds, and prediction caches are
+disabled, so runs are comparable across commits on the same machine.
+Results are JSON: run metadata plus one entry per metric name.
+
+Usage:
+    python benchmarks/run_suite.py [--quick] [-o results.json]
+    python benchmarks/run_suite.py compare base.json new.json [--tolerance 0.1]
+
+Requires httpx for the backend measurements.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import (
+    ROOT,
+    SAMPLE_FORMS,
+    SAMPLE_PAYLOADS,
+    build_backend_models,
+    build_models_dir,
+    summarize,
+    time_per_call,
+)
+
+MODEL_TYPES = ("ectopic", "molar")
+PREDICTOR_SCRIPT = ROOT / "python" / "model_predictor.py"
+
+
+def varied(sample, n):
+    """``n`` copies of ``sample`` with distinct ages, so rows are not identical."""
+    return [{**sample, "age": 18 + i % 30} for i in range(n)]
+
+
+def latency_entry(samples):
+    return {"unit": "ms", "n": len(samples), **summarize(samples)}
+
+
+def throughput_entry(n_rows, seconds):
+    per_run = np.array(seconds)
+    return {
+        "unit": "rows/s",
+        "rows": n_rows,
+        "runs": len(per_run),
+        "rows_per_second": float(n_rows / np.median(per_run)),
+    }
+
+
+def time_runs(fn, runs):
+    fn()
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+# ---------- PREDICTOR PATH ----------
+def bench_predictor(args, results):
+    with tempfile.TemporaryDirectory(prefix="bench-models-") as tmp_dir:
+        models_dir = build_models_dir(tmp_dir, n_estimators=args.estimators)
+        os.environ["PREDICTOR_MODELS_DIR"] = str(models_dir)
+        env = {**os.environ, "PREDICTION_CACHE_SIZE": "0"}
+
+        from model_predictor import create_predictor
+
+        for model_type in MODEL_TYPES:
+            prefix = f"predictor/{model_type}"
+            predictor = create_predictor(model_type, models_dir)
+            form = SAMPLE_FORMS[model_type]
+            x = predictor.encode_features(form)
+
+            results[f"{prefix}/preprocess"] = latency_entry(
+                time_per_call(lambda: predictor.encode_features(form), args.repeat)
+            )
+            results[f"{prefix}/inference"] = latency_entry(
+                time_per_call(lambda: predictor.model.predict_proba(x), args.repeat)
+            )
+            results[f"{prefix}/single_in_process"] = latency_entry(
+                time_per_call(lambda: predictor.predict_json(form), args.repeat)
+            )
+
+            argv = [sys.executable, str(PREDICTOR_SCRIPT), model_type, json.dumps(form)]
+            samples = []
+            for _ in range(args.subprocess_runs):
+                start = time.perf_counter()
+                proc = subprocess.run(argv, env=env, capture_output=True, text=True)
+                samples.append((time.perf_counter() - start) * 1000)
+                if "error" in json.loads(proc.stdout.strip().splitlines()[-1]):
+                    raise SystemExit(f"{model_type} subprocess prediction failed: {proc.stdout}")
+            results[f"{prefix}/single_subprocess"] = latency_entry(np.array(samples))
+
+            records = varied(form, args.batch_size)
+            results[f"{prefix}/batch"] = throughput_entry(
+                args.batch_size, time_runs(lambda: predictor.predict_many(records, as_json=True), args.batch_runs)
+            )
+
+
+# ---------- BACKEND PATH ----------
+async def post_sequentially(client, path, bodies):
+    samples = []
+    for body in bodies:
+        start = time.perf_counter()
+        response = await client.post(path, json=body)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.array(samples)
+
+
+async def drive_backend(app, model_type, args):
+    import httpx
+
+    single = varied(SAMPLE_PAYLOADS[model_type], args.repeat)
+    batch = varied(SAMPLE_PAYLOADS[model_type], args.batch_size)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await post_sequentially(client, f"/predict/{model_type}", single[:10])
+        latencies = await post_sequentially(client, f"/predict/{model_type}", single)
+
+        await post_sequentially(client, f"/predict/{model_type}/batch", [batch])
+        seconds = []
+        for _ in range(args.batch_runs):
+            start = time.perf_counter()
+            await post_sequentially(client, f"/predict/{model_type}/batch", [batch])
+            seconds.append(time.perf_counter() - start)
+    return latencies, seconds
+
+
+def bench_backend(args, results):
+    with tempfile.TemporaryDirectory(prefix="bench-models-") as tmp_dir:
+        paths = build_backend_models(tmp_dir, n_estimators=args.estimators)
+        os.environ["ECTOPIC_MODEL_PATH"] = str(paths["ectopic"])
+        os.environ["MOLAR_MODEL_PATH"] = str(paths["molar"])
+        # Measure inference, not the cache, and never shed load
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+        os.environ["INFERENCE_QUEUE_SIZE"] = str(max(args.repeat, 64))
+
+        import main as backend
+        from inference import score
+
+        backend.load_models()
+        try:
+            for model_type in MODEL_TYPES:
+                prefix = f"backend/{model_type}"
+                payload_cls = backend.EctopicPayload if model_type == "ectopic" else backend.MolarPayload
+                entry = backend.registry.get(model_type)
+                encoder, model = entry.encoder, entry.model
+                body = SAMPLE_PAYLOADS[model_type]
+                x = encoder.encode_batch([body])
+
+                results[f"{prefix}/preprocess"] = latency_entry(
+                    time_per_call(lambda: encoder.encode_batch([payload_cls.parse_obj(body).dict()]), args.repeat)
+                )
+                results[f"{prefix}/inference"] = latency_entry(
+                    time_per_call(lambda: score(model, x, 0.5), args.repeat)
+                )
+                latencies, seconds = asyncio.run(drive_backend(backend.app, model_type, args))
+                results[f"{prefix}/single_request"] = latency_entry(latencies)
+                results[f"{prefix}/batch"] = throughput_entry(args.batch_size, seconds)
+        finally:
+            backend.inference_executor.shutdown()
+
+
+# ---------- METADATA ----------
+def git_revision():
+    def git(*argv):
+        proc = subprocess.run(["git", *argv], cwd=ROOT, capture_output=True, text=True)
+        return proc.stdout.strip() if proc.returncode == 0 else None
+
+    commit = git("rev-parse", "HEAD")
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": commit, "dirty": bool(status) if status is not None else None}
+
+
+def package_versions():
+    from importlib.metadata import PackageNotFoundError, version
+
+    versions = {}
+    for name in ("numpy", "pandas", "scikit-learn", "joblib", "fastapi", "pydantic"):
+        try:
+            versions[name] = version(name)
+        except PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def run(args):
+    if args.quick:
+        args.repeat, args.subprocess_runs, args.batch_runs = 50, 3, 3
+
+    results = {}
+    if "predictor" in args.paths:
+        bench_predictor(args, results)
+    if "backend" in args.paths:
+        bench_backend(args, results)
+
+    report = {
+        "meta": {
+            "label": args.label,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            **git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "packages": package_versions(),
+            "params": {
+                "estimators": args.estimators,
+                "repeat": args.repeat,
+                "subprocess_runs": args.subprocess_runs,
+                "batch_size": args.batch_size,
+                "batch_runs": args.batch_runs,
+            },
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+# ---------- COMPARE ----------
+def headline(entry):
+    """The value compared across runs and whether higher is better."""
+    if entry["unit"] == "rows/s":
+        return entry["rows_per_second"], True
+    return entry["p50_ms"], False
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = []
+    print(f"{'metric':<40} {'unit':<7} {'base':>12} {'new':>12} {'change':>8}")
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        old_value, higher_is_better = headline(base["results"][name])
+        new_value, _ = headline(new["results"][name])
+        change = (new_value - old_value) / old_value
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > args.tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        unit = new["results"][name]["unit"]
+        print(f"{name:<40} {unit:<7} {old_value:>12.3f} {new_value:>12.3f} {change:>+8.1%}{flag}")
+
+    for name in sorted(set(base["results"]) ^ set(new["results"])):
+        print(f"{name:<40} only in {'base' if name in base['results'] else 'new'}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(prog="run_suite.py compare")
+        parser.add_argument("base")
+        parser.add_argument("new")
+        parser.add_argument("--tolerance", type=float, default=0.1,
+                            help="Relative slowdown reported as a regression (default 0.1)")
+        parser.add_argument("--fail-on-regression", action="store_true")
+        sys.exit(compare(parser.parse_args(sys.argv[2:])))
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--label", help="Free-form tag stored in the report metadata")
+    parser.add_argument("--paths", nargs="+", choices=("predictor", "backend"), default=["predictor", "backend"])
+    parser.add_argument("--estimators", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=300, help="Samples per latency metric")
+    parser.add_argument("--subprocess-runs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-runs", type=int, default=10)
+    parser.add_argument("--quick", action="store_true", help="Fewer samples, for a smoke run")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
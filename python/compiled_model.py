@@ -0,0 +1,267 @@
+"""NumPy-only inference for exported tree-ensemble and linear models.
+
+``export_model`` flattens a fitted sklearn estimator into plain arrays:
+
+* decision trees, random forests and extra-trees: every node of every tree
+  concatenated into ``feature``/``threshold``/``left``/``right`` arrays
+  plus per-node class probabilities, with leaves pointing at themselves;
+* logistic regression: the coefficient matrix and intercepts.
+
+The arrays are saved as an ``.npz`` file (no pickle). ``CompiledModel``
+loads them and exposes ``predict_proba``/``predict``/``classes_``/
+``feature_names_in_`` like the original estimator, so the predictor and the
+backend score it unchanged, without importing sklearn or joblib.
+
+Trees are evaluated for all rows and all trees at once: each step moves
+every (tree, row) cursor one level down with a few ``np.take`` calls, and
+cursors that reached a leaf are dropped every few steps. As in sklearn,
+inputs are compared as float32. Single rows score in a fraction of a
+millisecond; for large batches of varied rows sklearn's Cython traversal
+can still be faster.
+
+Set ``MODEL_ENGINE=compiled`` to make the predictor and the backend serve
+the ``.npz`` next to each configured model file. Export (and check parity
+against the original model) with:
+
+    python python/compiled_model.py export models/molar_pregnancy_model.pkl
+    python python/compiled_model.py verify models/molar_pregnancy_model.pkl models/molar_pregnancy_model.npz
+"""
+import sys
+
+import numpy as np
+
+from model_artifacts import artifact_path, load_model
+
+# Rows per tree-traversal pass; bounds the (trees, rows) working arrays
+TREE_CHUNK_ROWS = 4096
+# Tree-traversal steps between removals of cursors that reached a leaf
+COMPACT_EVERY = 3
+
+class UnsupportedModel(Exception):
+    """Raised when an estimator has no compiled equivalent."""
+
+# ---------- EXPORT ----------
+def export_model(model):
+    """Return the compiled arrays for a fitted estimator as a dict."""
+    kind = type(model).__name__
+    if hasattr(model, "estimators_") and kind in ("RandomForestClassifier", "ExtraTreesClassifier"):
+        arrays = _export_trees([tree.tree_ for tree in model.estimators_])
+    elif kind == "DecisionTreeClassifier":
+        arrays = _export_trees([model.tree_])
+    elif kind == "LogisticRegression":
+        arrays = {
+            "kind": np.array("linear"),
+            "coef": np.asarray(model.coef_, dtype=np.float64),
+            "intercept": np.asarray(model.intercept_, dtype=np.float64),
+        }
+    else:
+        raise UnsupportedModel(f"Cannot compile {kind}; supported: random forest, extra trees, decision tree, logistic regression")
+
+    arrays["classes"] = np.asarray(model.classes_)
+    if hasattr(model, "feature_names_in_"):
+        arrays["feature_names"] = np.asarray(model.feature_names_in_, dtype=str)
+    arrays["n_features"] = np.array(model.n_features_in_)
+    return arrays
+
+def _export_trees(trees):
+    features, thresholds, lefts, rights, values, missing_left, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(n)
+        # Leaves point at themselves, so extra steps past a leaf are no-ops
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        # Per-node class probabilities, normalized as DecisionTreeClassifier.predict_proba does
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        values.append(value / totals)
+        missing = getattr(tree, "missing_go_to_left", None)
+        missing_left.append(np.zeros(n, dtype=bool) if missing is None else missing.astype(bool))
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n
+    return {
+        "kind": np.array("trees"),
+        "feature": np.concatenate(features).astype(np.intp),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.intp),
+        "right": np.concatenate(rights).astype(np.intp),
+        "value": np.concatenate(values),
+        "missing_left": np.concatenate(missing_left),
+        "roots": np.asarray(roots, dtype=np.intp),
+        "max_depth": np.array(max_depth),
+    }
+
+def save_compiled(model, path):
+    np.savez(path, **export_model(model))
+    return path
+
+def load_compiled(path):
+    with np.load(path, allow_pickle=False) as data:
+        return CompiledModel({name: data[name] for name in data.files})
+
+# ---------- INFERENCE ----------
+class CompiledModel:
+    """Vectorized stand-in for the exported estimator's prediction API."""
+
+    def __init__(self, arrays):
+        self.kind = str(arrays["kind"])
+        self.classes_ = arrays["classes"]
+        self.n_features_in_ = int(arrays["n_features"])
+        if "feature_names" in arrays:
+            self.feature_names_in_ = arrays["feature_names"].astype(object)
+        if self.kind == "trees":
+            self.feature = arrays["feature"]
+            self.threshold = arrays["threshold"]
+            self.value = arrays["value"]
+            self.roots = arrays["roots"]
+            self.max_depth = int(arrays["max_depth"])
+            # children[2 * node + go_right] is the next node; leaves loop on themselves
+            self.children = np.stack([arrays["left"], arrays["right"]], axis=1).ravel()
+            self.is_leaf = arrays["left"] == np.arange(len(arrays["left"]))
+            self.missing_right = ~arrays["missing_left"]
+        else:
+            self.coef = arrays["coef"]
+            self.intercept = arrays["intercept"]
+
+    def predict_proba(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {x.shape[1]} features, but the model expects {self.n_features_in_}")
+        if self.kind != "trees":
+            return self._linear_proba(x)
+        if len(x) <= TREE_CHUNK_ROWS:
+            return self._tree_proba(x)
+        return np.vstack([
+            self._tree_proba(x[start:start + TREE_CHUNK_ROWS])
+            for start in range(0, len(x), TREE_CHUNK_ROWS)
+        ])
+
+    def predict(self, x):
+        return self.classes_[self.predict_proba(x).argmax(axis=1)]
+
+    def _tree_proba(self, x):
+        n_rows = len(x)
+        n_trees = len(self.roots)
+        # sklearn trees compare float32 inputs against float64 thresholds
+        x = x.astype(np.float32).astype(np.float64)
+        has_nan = bool(np.isnan(x).any())
+        # Feature-major, so each step reads one feature column per tree
+        columns = np.ascontiguousarray(x.T).ravel()
+        column_offsets = self.feature * n_rows
+
+        # One cursor per (tree, row), tree-major
+        nodes = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows), n_trees)
+        leaves = nodes.copy()
+        active = None
+        for depth in range(self.max_depth):
+            values = np.take(columns, np.take(column_offsets, nodes) + rows)
+            go_right = values > np.take(self.threshold, nodes)
+            if has_nan:
+                go_right |= np.isnan(values) & np.take(self.missing_right, nodes)
+            nodes = np.take(self.children, 2 * nodes + go_right)
+            if depth % COMPACT_EVERY == COMPACT_EVERY - 1:
+                if active is None:
+                    leaves[:] = nodes
+                    active = np.flatnonzero(~np.take(self.is_leaf, nodes))
+                    keep = active
+                else:
+                    leaves[active] = nodes
+                    keep = np.flatnonzero(~np.take(self.is_leaf, nodes))
+                    active = active[keep]
+                nodes = nodes[keep]
+                rows = rows[keep]
+                if not len(nodes):
+                    break
+        if active is None:
+            leaves = nodes
+        else:
+            leaves[active] = nodes
+        return self.value[leaves].reshape(n_trees, n_rows, -1).sum(axis=0) / n_trees
+
+    def _linear_proba(self, x):
+        decision = x @ self.coef.T + self.intercept
+        if decision.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-decision[:, 0]))
+            return np.column_stack([1 - positive, positive])
+        decision -= decision.max(axis=1, keepdims=True)
+        np.exp(decision, out=decision)
+        return decision / decision.sum(axis=1, keepdims=True)
+
+# ---------- PARITY ----------
+def probe_rows(compiled, n_rows=2000, seed=0):
+    """Random rows spanning every feature's split range, plus rows with one
+    feature set exactly to one of its split points."""
+    rng = np.random.default_rng(seed)
+    n_features = compiled.n_features_in_
+    if compiled.kind != "trees":
+        return rng.normal(0, 10, (n_rows, n_features))
+    internal = ~compiled.is_leaf
+    thresholds = compiled.threshold[internal]
+    features = compiled.feature[internal]
+    finite = [thresholds[(features == f) & np.isfinite(thresholds)] for f in range(n_features)]
+    low = np.array([s.min() - 1 if len(s) else 0 for s in finite])
+    high = np.array([s.max() + 1 if len(s) else 1 for s in finite])
+    rows = rng.uniform(low, high, (n_rows, n_features))
+    on_splits = []
+    for f, values in enumerate(finite):
+        values = values[:50]
+        block = rows[:len(values)].copy()
+        block[:, f] = values
+        on_splits.append(block)
+    return np.vstack([rows, *on_splits])
+
+def check_parity(model, compiled, x=None, atol=1e-9):
+    """Compare probabilities and labels; returns the max absolute difference.
+
+    Raises AssertionError when they disagree.
+    """
+    x = probe_rows(compiled) if x is None else np.asarray(x, dtype=np.float64)
+    import warnings
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        expected = model.predict_proba(x)
+        expected_labels = model.predict(x)
+    actual = compiled.predict_proba(x)
+    diff = float(np.abs(expected - actual).max())
+    if diff > atol:
+        raise AssertionError(f"Compiled probabilities differ by up to {diff:.3g}")
+    mismatched = int((compiled.predict(x) != expected_labels).sum())
+    if mismatched:
+        raise AssertionError(f"Compiled labels differ on {mismatched} of {len(x)} rows")
+    return diff
+
+def main():
+    usage = (
+        "Usage: compiled_model.py export <model> [<output .npz>]\n"
+        "       compiled_model.py verify <model> <compiled .npz>"
+    )
+    if len(sys.argv) < 3 or sys.argv[1] not in ("export", "verify"):
+        print(usage, file=sys.stderr)
+        sys.exit(2)
+
+    model = load_model(sys.argv[2], mmap_mode=None)
+    if sys.argv[1] == "export":
+        output = sys.argv[3] if len(sys.argv) > 3 else artifact_path(sys.argv[2], "compiled")
+        compiled = CompiledModel(export_model(model))
+        diff = check_parity(model, compiled)
+        save_compiled(model, output)
+        print(f"Wrote compiled model to {output} (max probability difference {diff:.3g})", file=sys.stderr)
+    else:
+        if len(sys.argv) != 4:
+            print(usage, file=sys.stderr)
+            sys.exit(2)
+        diff = check_parity(model, load_compiled(sys.argv[3]))
+        print(f"Parity OK (max probability difference {diff:.3g})", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
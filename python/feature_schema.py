@@ -0,0 +1,283 @@
+"""Declarative feature schemas shared by the predictor script and the API.
+
+Each schema lists the form fields a model consumes: how a value is parsed,
+its default, and which model columns it fills. ``compile_encoder`` turns a
+schema into an encoder plan for one model's column order. It is checked
+against the model's ``feature_names_in_`` (or ``n_features_in_``) when the
+model loads and writes records straight into NumPy rows.
+
+Field lookup is case-insensitive. Lenient schemas (ectopic) fall back to the
+field default on blank or unparsable values. Strict schemas (molar) reject
+them with ValueError. ``combined_form`` prepares one form for both models:
+keys are lower-cased once (every encoder reuses them) and fields the models
+share under different names are filled in under both.
+"""
+
+NUMBER = "number"
+FLAG = "flag"
+ONE_HOT = "one_hot"
+
+class SchemaMismatch(ValueError):
+    """Raised when a model's columns cannot be produced from its schema."""
+
+class Field:
+    def __init__(self, name, kind, default=0, column=None, aliases=(),
+                 truthy=("yes",), categories=(), prefix=None, identifier=False):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.column = column or name
+        self.keys = tuple(k.lower() for k in (name, *aliases))
+        self.truthy = tuple(truthy)
+        self.categories = tuple(categories)
+        self.prefix = prefix if prefix is not None else f"{self.column}_"
+        self.identifier = identifier
+
+    @property
+    def columns(self):
+        if self.kind == ONE_HOT:
+            return [self.prefix + category for category in self.categories]
+        return [self.column]
+
+class FeatureSchema:
+    def __init__(self, name, fields, strict):
+        self.name = name
+        self.fields = fields
+        self.strict = strict
+
+    @property
+    def columns(self):
+        """Default model column order (used when a model has no feature names)."""
+        return [column for field in self.fields for column in field.columns]
+
+    def model_feature_names(self, model):
+        """Column order ``model`` expects, validated against this schema.
+
+        A model fitted without feature names gets the schema's columns, or
+        the schema's columns minus the identifier columns (e.g.
+        ``PatientID``) when it was trained without them.
+        """
+        if hasattr(model, "feature_names_in_"):
+            return [str(name) for name in model.feature_names_in_]
+        columns = self.columns
+        n_features = getattr(model, "n_features_in_", len(columns))
+        if n_features == len(columns):
+            return columns
+        identifiers = {field.column for field in self.fields if field.identifier}
+        without_identifiers = [name for name in columns if name not in identifiers]
+        if n_features == len(without_identifiers):
+            return without_identifiers
+        raise SchemaMismatch(
+            f"{self.name} model expects {n_features} features without names; "
+            f"schema defines {len(columns)} ({len(without_identifiers)} without identifiers)"
+        )
+
+# ---------- SCHEMAS ----------
+ECTOPIC_SCHEMA = FeatureSchema("ectopic", strict=False, fields=[
+    Field("PatientID", NUMBER, default=0, identifier=True),
+    Field("Age", NUMBER, default=25),
+    Field("Gravidity", NUMBER),
+    Field("Parity", NUMBER),
+    Field("Abortions", NUMBER),
+    Field("EctopicPregnancyHistory", FLAG, aliases=["historyOfEctopicPregnancy"],
+          truthy=("yes", "true", "1")),
+    Field("PelvicInflammatoryDisease", FLAG, truthy=("yes", "true", "1")),
+    Field("TubalSurgeryHistory", FLAG, truthy=("yes", "true", "1")),
+    Field("InfertilityTreatment", FLAG, truthy=("yes", "true", "1")),
+    Field("SmokingStatus", FLAG, truthy=("yes", "true", "1")),
+    Field("ContraceptiveUse", FLAG, truthy=("yes", "true", "1")),
+    Field("LastMenstrualPeriodDays", NUMBER, default=28),
+    Field("VaginalBleeding", FLAG, truthy=("yes", "true", "1")),
+    Field("AbdominalPain", FLAG, truthy=("yes", "true", "1")),
+    Field("SerumHCGLevel", NUMBER),
+    Field("ProgesteroneLevel", NUMBER),
+    Field("UterineSizeByUltrasound", NUMBER),
+    Field("AdnexalMass", FLAG, truthy=("yes", "true", "1")),
+    Field("FreeFluidInPouchOfDouglas", FLAG, truthy=("yes", "true", "1")),
+])
+
+MOLAR_SCHEMA = FeatureSchema("molar", strict=True, fields=[
+    Field("PatientID", NUMBER, identifier=True),
+    Field("age", NUMBER),
+    Field("ageGroup", ONE_HOT, prefix="age_group_", categories=["<20", "20-35", ">35"]),
+    Field("gravida", NUMBER),
+    Field("parity", NUMBER),
+    Field("historyOfMolarPregnancy", FLAG),
+    Field("historyOfMiscarriages", FLAG),
+    Field("numberOfMiscarriages", NUMBER),
+    Field("vaginalBleeding", FLAG),
+    Field("excessiveNausea", FLAG),
+    Field("pelvicPain", FLAG),
+    Field("passageOfVesicles", FLAG),
+    Field("uterineSizeLarger", FLAG),
+    Field("quantitativeHCG", NUMBER),
+    Field("bloodGroup", ONE_HOT, categories=["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]),
+    Field("rhStatus", FLAG, truthy=("positive",)),
+    Field("thyroidFunction", ONE_HOT, categories=["normal", "hyperthyroid", "hypothyroid", "unknown"]),
+    Field("gestationalSacPresent", FLAG),
+    Field("fetalHeartbeat", FLAG),
+    Field("snowstormAppearance", FLAG),
+    Field("ovarianCysts", FLAG),
+    Field("assistedReproduction", FLAG),
+    Field("smokingAlcohol", FLAG),
+])
+
+SCHEMAS = {"ectopic": ECTOPIC_SCHEMA, "molar": MOLAR_SCHEMA}
+
+# The same measurement under the ectopic and the molar field name
+SHARED_FIELDS = [("gravidity", "gravida"), ("serumhcglevel", "quantitativehcg")]
+
+# ---------- ENCODER ----------
+_MISSING = object()
+
+class NormalizedForm(dict):
+    """Form data with lower-cased keys, ready for any encoder to read as-is."""
+
+    @classmethod
+    def of(cls, form_data):
+        if isinstance(form_data, cls):
+            return form_data
+        return cls((k.lower(), v) for k, v in form_data.items())
+
+def combined_form(form_data):
+    """Normalize a form once for both models, copying shared fields across names."""
+    normalized = NormalizedForm((k.lower(), v) for k, v in form_data.items())
+    for ectopic_name, molar_name in SHARED_FIELDS:
+        if ectopic_name in normalized:
+            normalized.setdefault(molar_name, normalized[ectopic_name])
+        elif molar_name in normalized:
+            normalized[ectopic_name] = normalized[molar_name]
+    return normalized
+
+class CompiledEncoder:
+    """Encoder plan for one schema and one model column order."""
+
+    def __init__(self, schema, feature_names):
+        import numpy as np
+
+        self.schema = schema
+        self.feature_names = list(feature_names)
+        index = {name: i for i, name in enumerate(self.feature_names)}
+
+        produced = set(schema.columns)
+        unknown = [name for name in self.feature_names if name not in produced]
+        if unknown:
+            raise SchemaMismatch(f"{schema.name} schema cannot produce model columns: {unknown}")
+
+        self.identifier_indices = [
+            index[field.column] for field in schema.fields
+            if field.identifier and field.column in index
+        ]
+        self._numbers = []
+        self._flags = []
+        self._one_hots = []
+        self._template = np.zeros(len(self.feature_names))
+        for field in schema.fields:
+            if field.kind == ONE_HOT:
+                lookup = {c: index[field.prefix + c] for c in field.categories if field.prefix + c in index}
+                if lookup:
+                    self._one_hots.append((field.keys, lookup))
+            elif field.column in index:
+                i = index[field.column]
+                self._template[i] = field.default
+                if field.kind == NUMBER:
+                    self._numbers.append((i, field.keys, field.default))
+                else:
+                    self._flags.append((i, field.keys, field.default, field.truthy))
+
+    @staticmethod
+    def _lookup(normalized, keys):
+        for key in keys:
+            value = normalized.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return _MISSING
+
+    def reset_identifiers(self, matrix):
+        """Set identifier columns (e.g. ``PatientID``) back to their defaults, in place.
+
+        Cached scoring does this so a result never depends on who submitted
+        the form, and a cache hit returns exactly what scoring would.
+        """
+        for i in self.identifier_indices:
+            matrix[:, i] = self._template[i]
+        return matrix
+
+    def encode_row(self, form_data, out):
+        """Write the features for one record into the preallocated row ``out``."""
+        normalized = NormalizedForm.of(form_data)
+        strict = self.schema.strict
+        lookup = self._lookup
+        out[:] = self._template
+
+        for i, keys, default in self._numbers:
+            value = lookup(normalized, keys)
+            if value is _MISSING:
+                continue
+            if strict:
+                out[i] = float(value)
+            elif value != '' and value is not None:
+                try:
+                    out[i] = float(value)
+                except (ValueError, TypeError):
+                    pass
+
+        for i, keys, default, truthy in self._flags:
+            value = lookup(normalized, keys)
+            if value is _MISSING:
+                continue
+            if isinstance(value, str):
+                out[i] = 1 if value.lower() in truthy else 0
+            elif isinstance(value, (int, float)):
+                out[i] = 1 if value > 0 else 0
+            elif strict:
+                raise ValueError(f"Invalid value for {keys[0]}: {value!r}")
+
+        for keys, categories in self._one_hots:
+            value = lookup(normalized, keys)
+            if isinstance(value, str) and value in categories:
+                out[categories[value]] = 1
+        return out
+
+    def encode_batch(self, records):
+        """Encode records into an (n_records, n_features) matrix; raises on a bad record."""
+        import numpy as np
+
+        matrix = np.empty((len(records), len(self.feature_names)))
+        for row, form_data in zip(matrix, records):
+            self.encode_row(form_data, row)
+        return matrix
+
+    def encode_many(self, records):
+        """Encode records, skipping bad ones.
+
+        Returns ``(matrix, valid_indices, errors)`` where ``matrix`` holds one
+        row per valid record and ``errors`` maps record index to message.
+        Records with infinite or NaN values count as bad, since one of them
+        would fail ``predict_proba`` for the whole matrix.
+        """
+        import numpy as np
+
+        matrix = np.empty((len(records), len(self.feature_names)))
+        valid_indices = []
+        errors = {}
+        for i, form_data in enumerate(records):
+            row = matrix[len(valid_indices)]
+            try:
+                self.encode_row(form_data, row)
+            except Exception as e:
+                errors[i] = str(e)
+                continue
+            finite = np.isfinite(row)
+            if not finite.all():
+                errors[i] = f"Non-finite value for {self.feature_names[int(np.argmin(finite))]}"
+                continue
+            valid_indices.append(i)
+        return matrix[:len(valid_indices)], valid_indices, errors
+
+def compile_encoder(model_type, model=None, feature_names=None):
+    """Compile the encoder for ``model_type`` against a model or explicit column list."""
+    schema = SCHEMAS[model_type]
+    if feature_names is None:
+        feature_names = schema.model_feature_names(model) if model is not None else schema.columns
+    return CompiledEncoder(schema, feature_names)
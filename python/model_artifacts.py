@@ -0,0 +1,98 @@
+"""Loading and saving model artifacts.
+
+Artifacts written by ``save_mmap_artifact`` are uncompressed joblib files,
+so ``load_model(path, mmap_mode="r")`` maps their NumPy arrays read-only
+from the page cache instead of copying them into each process. Several
+uvicorn or predictor workers loading the same file then share one copy of
+those arrays. Estimators that copy their arrays into private buffers on
+unpickling (sklearn trees do) still get a private copy per process.
+
+Convert an existing pickle/joblib model with:
+
+    python python/model_artifacts.py convert models/molar_pregnancy_model.pkl models/molar_pregnancy_model.joblib
+"""
+import hashlib
+import os
+import pickle
+import sys
+
+# Set to "r" to memory-map model arrays; unset keeps the regular loader
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE") or None
+
+# "compiled" serves the exported NumPy-only .npz next to each configured model
+# file (see compiled_model.py) instead of the sklearn estimator
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "sklearn")
+COMPILED_SUFFIX = ".npz"
+
+def is_compiled_artifact(path):
+    return str(path).endswith(COMPILED_SUFFIX)
+
+def artifact_path(path, engine=MODEL_ENGINE):
+    """Path to serve for ``path``: its .npz sibling when ``engine`` is "compiled"."""
+    if engine != "compiled" or is_compiled_artifact(path):
+        return path
+    root, _ = os.path.splitext(os.fspath(path))
+    return type(path)(root + COMPILED_SUFFIX)
+
+class ArtifactChanged(RuntimeError):
+    """Raised when an artifact file is replaced while it is being loaded."""
+
+def artifact_version(path):
+    """Short content hash identifying an artifact, stable across copies and hosts."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def _file_identity(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def load_versioned(path, mmap_mode=MODEL_MMAP_MODE):
+    """Load ``path`` and return ``(version, model)``.
+
+    The version is the content hash of the file that was loaded; raises
+    ArtifactChanged if the file was replaced in between, so a model is
+    never paired with another artifact's version.
+    """
+    identity = _file_identity(path)
+    version = artifact_version(path)
+    model = load_model(path, mmap_mode)
+    if _file_identity(path) != identity:
+        raise ArtifactChanged(f"{path} changed while it was being loaded")
+    return version, model
+
+def load_model(path, mmap_mode=MODEL_MMAP_MODE):
+    """Load a model with joblib (optionally memory-mapped), falling back to pickle.
+
+    Exported ``.npz`` artifacts load as a CompiledModel without joblib or sklearn.
+    """
+    if is_compiled_artifact(path):
+        from compiled_model import load_compiled
+        return load_compiled(path)
+    try:
+        import joblib
+        return joblib.load(path, mmap_mode=mmap_mode)
+    except Exception as e:
+        try:
+            with open(path, 'rb') as file:
+                return pickle.load(file)
+        except Exception as e2:
+            raise RuntimeError(f"{e}, {e2}") from e2
+
+def save_mmap_artifact(model, path):
+    """Write ``model`` uncompressed so its arrays can be memory-mapped."""
+    import joblib
+    joblib.dump(model, path, compress=0)
+    return path
+
+def main():
+    if len(sys.argv) != 4 or sys.argv[1] != "convert":
+        print("Usage: model_artifacts.py convert <input model> <output .joblib>", file=sys.stderr)
+        sys.exit(2)
+    save_mmap_artifact(load_model(sys.argv[2], mmap_mode=None), sys.argv[3])
+    print(f"Wrote memory-mappable artifact to {sys.argv[3]}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,394 +1,810 @@
 import sys
 import json
-import joblib 
-import numpy as np
-import pandas as pd
 import os
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-class EctopicPregnancyPredictor:
-    def __init__(self, model_path):
+from feature_schema import ECTOPIC_SCHEMA, MOLAR_SCHEMA, SchemaMismatch, combined_form, compile_encoder
+from model_artifacts import MODEL_ENGINE, MODEL_MMAP_MODE, artifact_path, is_compiled_artifact
+from request_profiler import profiler_from_env, stage
+from risk_bands import RiskBandTable
+from thread_limits import limit_threads
+import wire_protocol
+
+# numpy, pandas and joblib are imported inside the methods that use them, so
+# each invocation only pays for what the selected predictor needs (scoring
+# never imports pandas; only preprocess_data does) and bad input fails before
+# any of them load.
+# With MODEL_ENGINE=compiled the exported .npz models are served instead and
+# only numpy is imported.
+
+# Project root / models directory used by the CLI and the worker
+PROJECT_ROOT = Path(__file__).parent.parent
+MODELS_DIR = Path(os.getenv("PREDICTOR_MODELS_DIR", PROJECT_ROOT / "models"))
+MODEL_FILES = {
+    "ectopic": "ectopic_pregnancy_model.pkl",
+    "molar": "molar_pregnancy_model.pkl",
+}
+
+# Probability above which a case is labelled positive (1). 0.5 matches the
+# estimator's own predict() for binary models.
+DECISION_THRESHOLDS = {
+    "ectopic": float(os.getenv("ECTOPIC_DECISION_THRESHOLD", "0.5")),
+    "molar": float(os.getenv("MOLAR_DECISION_THRESHOLD", "0.5")),
+}
+
+# The compiled encoders emit columns in the model's own feature order, so
+# sklearn's "fitted with feature names" warning for ndarray input is noise.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+class PregnancyPredictor:
+    """Loads one model and scores its forms; subclasses set the model type.
+
+    ``MODEL_TYPE`` selects the feature schema, risk bands and profile names,
+    ``DISPLAY_NAME`` is used in log messages.
+    """
+    MODEL_TYPE = None
+    DISPLAY_NAME = None
+    DEFAULT_FEATURE_NAMES = []
+
+    def __init__(self, model_path, threshold=0.5):
         self.model_path = model_path
-        self.model = None
-        self.feature_names = [
-            'PatientID', 'Age', 'Gravidity', 'Parity', 'Abortions',
-            'EctopicPregnancyHistory', 'PelvicInflammatoryDisease', 
-            'TubalSurgeryHistory', 'InfertilityTreatment', 'SmokingStatus',
-            'ContraceptiveUse', 'LastMenstrualPeriodDays', 'VaginalBleeding',
-            'AbdominalPain', 'SerumHCGLevel', 'ProgesteroneLevel',
-            'UterineSizeByUltrasound', 'AdnexalMass', 'FreeFluidInPouchOfDouglas'
-        ]
+        self.threshold = threshold
+        # (model, encoder), replaced as one reference so a reload never pairs
+        # a request's model with another version's encoder
+        self.loaded = (None, None)
+        self.cache = None
+        # Opt-in request profiling (PROFILE_SLOW_MS / PROFILE_SAMPLE_RATE); None when off
+        self.profiler = profiler_from_env()
+        self.risk_bands = RiskBandTable(self.MODEL_TYPE)
+        self.feature_names = list(self.DEFAULT_FEATURE_NAMES)
         self.load_model()
-    
+
+    @property
+    def model(self):
+        return self.loaded[0]
+
+    @property
+    def encoder(self):
+        return self.loaded[1]
+
     def load_model(self):
+        """Load the model at model_path, or reload it after the file changed.
+
+        The new model and encoder are built before anything is swapped, so a
+        reload that fails (e.g. on a half-copied file) keeps serving the
+        model that is already loaded.
+        """
+        if is_compiled_artifact(self.model_path):
+            model = self.load_compiled_model()
+        else:
+            model = self.load_pickled_model()
+        encoder = self.compile_encoder(model) if model is not None else None
+        if encoder is None:
+            if self.model is not None:
+                print(f"Keeping the previously loaded {self.MODEL_TYPE} model", file=sys.stderr)
+            return False
+        self.loaded = (model, encoder)
+        self.feature_names = encoder.feature_names
+        return True
+
+    def load_pickled_model(self):
+        """Load the model with joblib, falling back to pickle; None on failure."""
         try:
             # Try joblib first (recommended for sklearn models)
-            self.model = joblib.load(self.model_path)
-            print("Ectopic pregnancy model loaded successfully with joblib", file=sys.stderr)
-            
-            # Get feature names from the loaded model if available
-            if hasattr(self.model, 'feature_names_in_'):
-                self.feature_names = list(self.model.feature_names_in_)
-                print(f"Using feature names from model: {self.feature_names}", file=sys.stderr)
-            else:
-                print("Model doesn't have feature_names_in_, using predefined names", file=sys.stderr)
-                
+            import joblib
+            model = joblib.load(self.model_path, mmap_mode=MODEL_MMAP_MODE)
+            print(f"{self.DISPLAY_NAME} model loaded successfully with joblib", file=sys.stderr)
         except Exception as e:
             try:
                 # Fallback to pickle
                 import pickle
                 with open(self.model_path, 'rb') as file:
-                    self.model = pickle.load(file)
-                print("Ectopic pregnancy model loaded successfully with pickle", file=sys.stderr)
-                
-                # Get feature names from the loaded model if available
-                if hasattr(self.model, 'feature_names_in_'):
-                    self.feature_names = list(self.model.feature_names_in_)
-                    print(f"Using feature names from model: {self.feature_names}", file=sys.stderr)
-                else:
-                    print("Model doesn't have feature_names_in_, using predefined names", file=sys.stderr)
-                    
+                    model = pickle.load(file)
+                print(f"{self.DISPLAY_NAME} model loaded successfully with pickle", file=sys.stderr)
             except Exception as e2:
-                print(f"Error loading ectopic model with both joblib and pickle: {e}, {e2}", file=sys.stderr)
-                self.model = None
+                print(f"Error loading {self.MODEL_TYPE} model with both joblib and pickle: {e}, {e2}", file=sys.stderr)
+                return None
+
+        # Get feature names from the loaded model if available
+        if hasattr(model, 'feature_names_in_'):
+            print(f"Using feature names from model: {list(model.feature_names_in_)}", file=sys.stderr)
+        else:
+            print("Model doesn't have feature_names_in_, using predefined names", file=sys.stderr)
+        return model
+
+    def load_compiled_model(self):
+        """Load an exported NumPy-only model (see compiled_model.py); no sklearn import."""
+        try:
+            from compiled_model import load_compiled
+            model = load_compiled(self.model_path)
+            print(f"{self.DISPLAY_NAME} model loaded successfully from compiled arrays", file=sys.stderr)
+            return model
+        except Exception as e:
+            print(f"Error loading compiled {self.MODEL_TYPE} model: {e}", file=sys.stderr)
+            return None
     
-    def preprocess_data(self, form_data):
+    def compile_encoder(self, model):
+        """Compile the shared schema for MODEL_TYPE against ``model``'s columns; None on mismatch."""
         try:
-            # Create a case-insensitive lookup dictionary
-            normalized_lookup = {k.lower(): k for k in form_data.keys()}
-            
-            # Define default values for different field types
-            field_defaults = {
-                'PatientID': 0,
-                'Age': 25,  # Default to typical reproductive age
-                'Gravidity': 0,
-                'Parity': 0,
-                'Abortions': 0,
-                'LastMenstrualPeriodDays': 28,  # Default to typical cycle
-                'SerumHCGLevel': 0,
-                'ProgesteroneLevel': 0,
-                'UterineSizeByUltrasound': 0,
-                # Boolean fields default to 0 (no/false)
-                'EctopicPregnancyHistory': 0,
-                'PelvicInflammatoryDisease': 0,
-                'SmokingStatus': 0,
-                'ContraceptiveUse': 0,
-                'InfertilityTreatment': 0,
-                'AdnexalMass': 0,
-                'FreeFluidInPouchOfDouglas': 0,
-                'VaginalBleeding': 0,
-                'AbdominalPain': 0,
-                'TubalSurgeryHistory': 0
-            }
-            
-            features = {}
-            missing_fields = []
-            
-            # Process each feature that the model expects
-            for feature_name in self.feature_names:
-                # Try to find the field in input data (case-insensitive)
-                search_key = feature_name.lower()
-                original_key = normalized_lookup.get(search_key)
-                
-                if original_key:
-                    # Field exists in input
-                    value = form_data.get(original_key)
-                    
-                    # Handle different field types
-                    if feature_name in ['PatientID', 'Age', 'Gravidity', 'Parity', 'Abortions', 
-                                      'LastMenstrualPeriodDays', 'SerumHCGLevel', 'ProgesteroneLevel', 
-                                      'UterineSizeByUltrasound']:
-                        # Numeric fields
-                        try:
-                            features[feature_name] = float(value) if value != '' and value is not None else field_defaults[feature_name]
-                        except (ValueError, TypeError):
-                            features[feature_name] = field_defaults[feature_name]
-                            print(f"Warning: Invalid numeric value for {feature_name}, using default", file=sys.stderr)
-                    else:
-                        # Boolean fields (yes/no)
-                        if isinstance(value, str):
-                            features[feature_name] = 1 if value.lower() in ['yes', 'true', '1'] else 0
-                        elif isinstance(value, bool):
-                            features[feature_name] = 1 if value else 0
-                        elif isinstance(value, (int, float)):
-                            features[feature_name] = 1 if value > 0 else 0
-                        else:
-                            features[feature_name] = field_defaults[feature_name]
-                else:
-                    # Field missing from input, use default
-                    features[feature_name] = field_defaults[feature_name]
-                    missing_fields.append(feature_name)
-            
-            if missing_fields:
-                print(f"Info: Using defaults for missing fields: {missing_fields}", file=sys.stderr)
-            
-            # Create DataFrame with proper feature names in correct order
-            df = pd.DataFrame([features], columns=self.feature_names)
-            return df
-        
+            return compile_encoder(self.MODEL_TYPE, model=model)
+        except SchemaMismatch as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return None
+
+    def encode_batch(self, records):
+        """Encode many records into one (n_records, n_features) matrix."""
+        return self.encoder.encode_batch(records)
+
+    def encode_features(self, form_data, encoder=None):
+        """Encode one record as a 1 x n_features array, or None if it is invalid."""
+        try:
+            return (encoder or self.encoder).encode_batch([form_data])
         except Exception as e:
-            print(f"Error preprocessing ectopic data: {e}", file=sys.stderr)
+            print(f"Error preprocessing {self.MODEL_TYPE} data: {e}", file=sys.stderr)
             return None
+
+    def preprocess_data(self, form_data):
+        """DataFrame view of encode_features, with the model's column names."""
+        features = self.encode_features(form_data)
+        if features is None:
+            return None
+        import pandas as pd
+        return pd.DataFrame(features, columns=self.feature_names)
     
-    def predict(self, form_data):
-        if self.model is None:
-            return {"error": "Model not loaded"}
+    def score(self, form_data, profile=None):
+        """Return ``(risk_probability, None)``, or ``(None, error_dict)`` on failure."""
+        cache = self.cache
+        # Read before the model, so a result from a model swapped out meanwhile is never cached
+        generation = cache.generation if cache is not None else None
+        model, encoder = self.loaded
+        if model is None:
+            return None, {"error": "Model not loaded"}
         
         try:
-            features_df = self.preprocess_data(form_data)
-            if features_df is None:
-                return {"error": "Invalid input data"}
+            with stage(profile, "preprocessing"):
+                features = self.encode_features(form_data, encoder)
+            if features is None:
+                return None, {"error": "Invalid input data"}
+
+            cache_key = None
+            if cache is not None:
+                cache_key = cache.key(encoder.reset_identifiers(features))
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return cached, None
             
-            prediction = self.model.predict(features_df)
-            prediction_proba = self.model.predict_proba(features_df)
+            with stage(profile, "inference"):
+                risk_probability = float(model.predict_proba(features)[0][1])
             
-            return self.interpret_results(prediction_proba)
+            if cache_key is not None:
+                cache.put(cache_key, risk_probability, generation)
+            return risk_probability, None
         
         except Exception as e:
             print(f"Error in prediction: {e}", file=sys.stderr)
-            return {"error": str(e)}
+            return None, {"error": str(e)}
+
+    def score_features(self, features, profile=None):
+        """Positive-class probabilities for pre-encoded rows in ``feature_names`` order.
+
+        Skips form parsing and encoding entirely (see wire_protocol.py).
+        """
+        model, encoder = self.loaded
+        if model is None:
+            raise RuntimeError("Model not loaded")
+        if features.ndim != 2 or features.shape[1] != len(encoder.feature_names):
+            raise ValueError(
+                f"Expected rows of {len(encoder.feature_names)} features, got shape {features.shape}"
+            )
+        with stage(profile, "inference"):
+            return model.predict_proba(features)[:, 1]
+
+    def predict(self, form_data):
+        profile = self.profiler.start(self.MODEL_TYPE) if self.profiler is not None else None
+        risk_probability, error = self.score(form_data, profile)
+        if error is not None:
+            result = error
+        else:
+            with stage(profile, "interpretation"):
+                result = self.risk_bands.interpret(risk_probability, risk_probability > self.threshold)
+        if profile is not None:
+            profile.finish()
+        return result
+
+    def predict_json(self, form_data):
+        """JSON text of predict(), spliced from the pre-serialized risk band."""
+        profile = self.profiler.start(self.MODEL_TYPE) if self.profiler is not None else None
+        risk_probability, error = self.score(form_data, profile)
+        with stage(profile, "serialization"):
+            if error is not None:
+                result = json.dumps(error)
+            else:
+                result = self.risk_bands.render(risk_probability, risk_probability > self.threshold)
+        if profile is not None:
+            profile.finish()
+        return result
+
+    def predict_many(self, records, as_json=False):
+        """Score many form records with a single predict_proba call.
+
+        Returns one result per record (JSON text with ``as_json``); records
+        that cannot be encoded get an error entry instead of failing the
+        whole call.
+        """
+        render = json.dumps if as_json else (lambda result: result)
+        model, encoder = self.loaded
+        if model is None:
+            return [render({"error": "Model not loaded"}) for _ in records]
+
+        profile = None
+        if self.profiler is not None:
+            profile = self.profiler.start(f"{self.MODEL_TYPE}/batch", rows=len(records))
+        with stage(profile, "preprocessing"):
+            matrix, valid_indices, errors = encoder.encode_many(records)
+        results = [None] * len(records)
+        for i, message in errors.items():
+            results[i] = render({"error": f"Invalid input data: {message}"})
+
+        if valid_indices:
+            interpret = self.risk_bands.render if as_json else self.risk_bands.interpret
+            with stage(profile, "inference"):
+                risk_probabilities = model.predict_proba(matrix)[:, 1]
+            with stage(profile, "serialization" if as_json else "interpretation"):
+                for row, i in enumerate(valid_indices):
+                    risk_probability = float(risk_probabilities[row])
+                    results[i] = interpret(risk_probability, risk_probability > self.threshold)
+        if profile is not None:
+            profile.finish()
+        return results
     
     def interpret_results(self, prediction_proba):
-        risk_probability = prediction_proba[0][1]  # Probability of ectopic pregnancy
-        
-        if risk_probability >= 0.7:
-            risk_level = "High"
-            recommendations = [
-                "Immediate gynecological consultation required",
-                "Emergency department evaluation recommended", 
-                "Serial hCG monitoring every 12-24 hours",
-                "Urgent transvaginal ultrasound examination",
-                "Consider diagnostic laparoscopy if clinically indicated",
-                "Patient requires immediate medical attention"
-            ]
-        elif risk_probability >= 0.4:
-            risk_level = "Moderate"
-            recommendations = [
-                "Gynecological consultation within 24-48 hours",
-                "Serial hCG monitoring every 48 hours",
-                "Transvaginal ultrasound examination",
-                "Close clinical monitoring required",
-                "Patient education on warning signs",
-                "Follow-up appointment scheduled"
-            ]
-        else:
-            risk_level = "Low"
-            recommendations = [
-                "Routine obstetric follow-up appropriate",
-                "Standard prenatal care monitoring",
-                "Patient education on pregnancy symptoms",
-                "Follow-up as clinically indicated",
-                "Monitor for any concerning symptoms"
-            ]
-        
-        return {
-            "riskLevel": risk_level,
-            "percentage": f"{risk_probability * 100:.1f}%",
-            "probability": float(risk_probability),
-            "recommendations": recommendations
+        risk_probability = float(prediction_proba[0][1])  # Probability of the positive class
+        return self.risk_bands.interpret(risk_probability, risk_probability > self.threshold)
+
+class EctopicPregnancyPredictor(PregnancyPredictor):
+    MODEL_TYPE = "ectopic"
+    DISPLAY_NAME = "Ectopic pregnancy"
+    DEFAULT_FEATURE_NAMES = ECTOPIC_SCHEMA.columns
+
+class MolarPregnancyPredictor(PregnancyPredictor):
+    MODEL_TYPE = "molar"
+    DISPLAY_NAME = "Molar pregnancy"
+    DEFAULT_FEATURE_NAMES = MOLAR_SCHEMA.columns
+
+class CombinedPredictor:
+    """Scores one patient form with both models in a single call.
+
+    The form is normalized once (``combined_form``) and shared by both
+    encoders, and the two models run concurrently (tree traversal releases
+    the GIL). Results are ``{"ectopic": ..., "molar": ...}``, each exactly
+    what that model's own predictor returns, so one model can report an
+    error while the other still scores.
+    """
+
+    def __init__(self, predictors):
+        self.predictors = predictors
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _map(self, method, form_data):
+        normalized = combined_form(form_data)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=len(self.predictors), thread_name_prefix="combined"
+                )
+        futures = {
+            model_type: self._executor.submit(getattr(predictor, method), normalized)
+            for model_type, predictor in self.predictors.items()
         }
+        return {model_type: future.result() for model_type, future in futures.items()}
 
-class MolarPregnancyPredictor:
-    def __init__(self, model_path):
-        self.model_path = model_path
-        self.model = None
-        self.feature_names = [
-            'PatientID', 'age', 'age_group_<20', 'age_group_20-35', 'age_group_>35',
-            'gravida', 'parity', 'historyOfMolarPregnancy', 'historyOfMiscarriages',
-            'numberOfMiscarriages', 'vaginalBleeding', 'excessiveNausea', 'pelvicPain',
-            'passageOfVesicles', 'uterineSizeLarger', 'quantitativeHCG',
-            'bloodGroup_A+', 'bloodGroup_A-', 'bloodGroup_B+', 'bloodGroup_B-',
-            'bloodGroup_AB+', 'bloodGroup_AB-', 'bloodGroup_O+', 'bloodGroup_O-',
-            'rhStatus', 'thyroidFunction_normal', 'thyroidFunction_hyperthyroid',
-            'thyroidFunction_hypothyroid', 'thyroidFunction_unknown',
-            'gestationalSacPresent', 'fetalHeartbeat', 'snowstormAppearance',
-            'ovarianCysts', 'assistedReproduction', 'smokingAlcohol'
-        ]
-        self.load_model()
-    
-    def load_model(self):
+    def predict(self, form_data):
+        return self._map("predict", form_data)
+
+    def predict_json(self, form_data):
+        """JSON text of predict(), splicing each model's pre-rendered result."""
+        results = self._map("predict_json", form_data)
+        return "{" + ", ".join(f'"{model_type}": {text}' for model_type, text in results.items()) + "}"
+
+def create_predictor(model_type, models_dir=MODELS_DIR):
+    """Build the predictor for ``model_type`` or return None if the type is unknown."""
+    if model_type == "combined":
+        return CombinedPredictor({
+            "ectopic": create_predictor("ectopic", models_dir),
+            "molar": create_predictor("molar", models_dir),
+        })
+    if model_type == "ectopic":
+        return EctopicPregnancyPredictor(
+            artifact_path(Path(models_dir) / MODEL_FILES["ectopic"]), DECISION_THRESHOLDS["ectopic"]
+        )
+    if model_type == "molar":
+        return MolarPregnancyPredictor(
+            artifact_path(Path(models_dir) / MODEL_FILES["molar"]), DECISION_THRESHOLDS["molar"]
+        )
+    return None
+
+# Requests a worker stream may have read ahead of its responses, per thread
+MAX_PENDING_PER_THREAD = 4
+
+class PredictorWorker:
+    """Long-lived worker that keeps both predictors loaded between requests.
+
+    Requests are newline-delimited JSON objects of the form
+    ``{"id": <any>, "model": "ectopic" | "molar" | "combined", "data": {...form data...}}``
+    and every response line echoes the request ``id`` so callers can keep
+    several requests in flight and match responses as they come back.
+    ``{"id": <any>, "op": "cache-stats"}`` returns the prediction cache counters.
+    With ``--binary`` the same requests, plus pre-encoded feature vectors,
+    use the length-prefixed framing in wire_protocol.py instead.
+    """
+
+    def __init__(self, models_dir=MODELS_DIR, max_workers=4):
+        from prediction_cache import cache_from_env
+
+        self.predictors = {
+            model_type: create_predictor(model_type, models_dir)
+            for model_type in MODEL_FILES
+        }
+        for predictor in self.predictors.values():
+            predictor.cache = cache_from_env(
+                model_path=predictor.model_path, on_invalidate=predictor.load_model
+            )
+        # Shares the loaded predictors (and their caches) with the single-model requests
+        self.predictors["combined"] = CombinedPredictor(
+            {model_type: self.predictors[model_type] for model_type in MODEL_FILES}
+        )
+        self.max_workers = max_workers
+
+    def handle(self, request):
+        """Return the JSON response line (without newline) for one request."""
+        request_id = request.get("id") if isinstance(request, dict) else None
         try:
-            # Try joblib first (recommended for sklearn models)
-            self.model = joblib.load(self.model_path)
-            print("Molar pregnancy model loaded successfully with joblib", file=sys.stderr)
-            
-            # Get feature names from the loaded model if available
-            if hasattr(self.model, 'feature_names_in_'):
-                self.feature_names = list(self.model.feature_names_in_)
-                print(f"Using feature names from model: {self.feature_names}", file=sys.stderr)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            if request.get("op") == "cache-stats":
+                result_json = json.dumps(self.cache_stats())
             else:
-                print("Model doesn't have feature_names_in_, using predefined names", file=sys.stderr)
-                
-        except Exception as e:
-            try:
-                # Fallback to pickle
-                import pickle
-                with open(self.model_path, 'rb') as file:
-                    self.model = pickle.load(file)
-                print("Molar pregnancy model loaded successfully with pickle", file=sys.stderr)
-                
-                # Get feature names from the loaded model if available
-                if hasattr(self.model, 'feature_names_in_'):
-                    self.feature_names = list(self.model.feature_names_in_)
-                    print(f"Using feature names from model: {self.feature_names}", file=sys.stderr)
+                predictor = self.predictors.get(request.get("model"))
+                if predictor is None:
+                    result_json = json.dumps({"error": "Invalid model type"})
                 else:
-                    print("Model doesn't have feature_names_in_, using predefined names", file=sys.stderr)
-                    
-            except Exception as e2:
-                print(f"Error loading molar model with both joblib and pickle: {e}, {e2}", file=sys.stderr)
-                self.model = None
-    
-    def preprocess_data(self, form_data):
+                    result_json = predictor.predict_json(request.get("data") or {})
+        except Exception as e:
+            result_json = json.dumps({"error": str(e)})
+        return f'{{"id": {json.dumps(request_id)}, "result": {result_json}}}'
+
+    def cache_stats(self):
+        stats = {}
+        for model_type in MODEL_FILES:
+            cache = self.predictors[model_type].cache
+            stats[model_type] = cache.stats() if cache else None
+        return stats
+
+    def handle_line(self, line):
         try:
-            # Convert keys to lowercase for case-insensitive matching
-            normalized_data = {k.lower(): v for k, v in form_data.items()}
-            
-            features = {}
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps({"id": None, "result": {"error": f"Invalid JSON: {e}"}})
+        return self.handle(request)
 
-            # Patient ID
-            features['PatientID'] = float(normalized_data.get("patientid", 0))
-            
-            # Patient Demographics
-            age = float(normalized_data.get('age', 0))
-            features['age'] = age
-            
-            # Age group encoding
-            age_group = normalized_data.get('agegroup', '')
-            features['age_group_<20'] = 1 if age_group == '<20' else 0
-            features['age_group_20-35'] = 1 if age_group == '20-35' else 0
-            features['age_group_>35'] = 1 if age_group == '>35' else 0
-            
-            features['gravida'] = float(normalized_data.get('gravida', 0))
-            features['parity'] = float(normalized_data.get('parity', 0))
-            features['historyOfMolarPregnancy'] = 1 if normalized_data.get('historyofmolarpregnancy', '').lower() == 'yes' else 0
-            features['historyOfMiscarriages'] = 1 if normalized_data.get('historyofmiscarriages', '').lower() == 'yes' else 0
-            features['numberOfMiscarriages'] = float(normalized_data.get('numberofmiscarriages', 0))
-            
-            # Presenting Symptoms
-            features['vaginalBleeding'] = 1 if normalized_data.get('vaginalbleeding', '').lower() == 'yes' else 0
-            features['excessiveNausea'] = 1 if normalized_data.get('excessivenausea', '').lower() == 'yes' else 0
-            features['pelvicPain'] = 1 if normalized_data.get('pelvicpain', '').lower() == 'yes' else 0
-            features['passageOfVesicles'] = 1 if normalized_data.get('passageofvesicles', '').lower() == 'yes' else 0
-            features['uterineSizeLarger'] = 1 if normalized_data.get('uterinesizelarger', '').lower() == 'yes' else 0
-            
-            # Laboratory Data
-            features['quantitativeHCG'] = float(normalized_data.get('quantitativehcg', 0))
-            
-            # Blood group encoding (one-hot)
-            blood_groups = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
-            blood_group = normalized_data.get('bloodgroup', '')
-            for bg in blood_groups:
-                features[f'bloodGroup_{bg}'] = 1 if blood_group == bg else 0
-            
-            features['rhStatus'] = 1 if normalized_data.get('rhstatus', '').lower() == 'positive' else 0
-            
-            # Thyroid function encoding
-            thyroid_conditions = ['normal', 'hyperthyroid', 'hypothyroid', 'unknown']
-            thyroid = normalized_data.get('thyroidfunction', '')
-            for condition in thyroid_conditions:
-                features[f'thyroidFunction_{condition}'] = 1 if thyroid == condition else 0
-            
-            # Ultrasound Findings
-            features['gestationalSacPresent'] = 1 if normalized_data.get('gestationalsacpresent', '').lower() == 'yes' else 0
-            features['fetalHeartbeat'] = 1 if normalized_data.get('fetalheartbeat', '').lower() == 'yes' else 0
-            features['snowstormAppearance'] = 1 if normalized_data.get('snowstormappearance', '').lower() == 'yes' else 0
-            features['ovarianCysts'] = 1 if normalized_data.get('ovariancysts', '').lower() == 'yes' else 0
-            
-            # Other Risk Factors
-            features['assistedReproduction'] = 1 if normalized_data.get('assistedreproduction', '').lower() == 'yes' else 0
-            features['smokingAlcohol'] = 1 if normalized_data.get('smokingalcohol', '').lower() == 'yes' else 0
-            
-            # Create DataFrame with proper feature names
-            df = pd.DataFrame([features], columns=self.feature_names)
-            return df
-        
-        except Exception as e:
-            print(f"Error preprocessing molar data: {e}", file=sys.stderr)
-            return None
-    
-    def predict(self, form_data):
-        if self.model is None:
-            return {"error": "Model not loaded"}
-        
+    def in_flight_limit(self):
+        """Semaphore bounding requests read but not yet answered on one stream.
+
+        Reading stops while it is exhausted, so a client pipelining a long
+        stream is held back instead of growing the executor's queue.
+        """
+        return threading.BoundedSemaphore(self.max_workers * MAX_PENDING_PER_THREAD)
+
+    def serve(self, infile, outfile):
+        """Serve requests from ``infile`` until EOF, writing responses to ``outfile``."""
+        write_lock = threading.Lock()
+        in_flight = self.in_flight_limit()
+
+        def respond(line):
+            try:
+                response = self.handle_line(line)
+                with write_lock:
+                    outfile.write(response + "\n")
+                    outfile.flush()
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for line in infile:
+                if line.strip():
+                    in_flight.acquire()
+                    executor.submit(respond, line)
+
+    # ---------- BINARY PROTOCOL ----------
+    def handle_frame(self, payload):
+        """Return the framed response for one binary request payload."""
+        request_id = 0
         try:
-            features_df = self.preprocess_data(form_data)
-            if features_df is None:
-                return {"error": "Invalid input data"}
-            
-            prediction = self.model.predict(features_df)
-            prediction_proba = self.model.predict_proba(features_df)
-            
-            return self.interpret_results(prediction_proba)
-        
+            request_id, op, model, n_features, n_rows, body = wire_protocol.decode_request(payload)
+            model_type = wire_protocol.MODEL_CODES.get(model)
+            predictor = self.predictors.get(model_type)
+            if predictor is None:
+                return wire_protocol.encode_error(request_id, "Invalid model type")
+            if op == wire_protocol.OP_FORM:
+                form_data = json.loads(bytes(body))
+                if not isinstance(form_data, dict):
+                    raise ValueError("Form must be a JSON object")
+                return wire_protocol.encode_response(request_id, predictor.predict_json(form_data).encode("utf-8"))
+            if op not in (wire_protocol.OP_FEATURES, wire_protocol.OP_SCHEMA):
+                return wire_protocol.encode_error(request_id, f"Unknown op: {op}")
+            if model_type == "combined":
+                return wire_protocol.encode_error(request_id, "Feature vectors are per model; use ectopic or molar")
+            if op == wire_protocol.OP_SCHEMA:
+                schema = {
+                    "featureNames": list(predictor.feature_names),
+                    "riskLevels": [band.level for band in predictor.risk_bands.bands],
+                    "threshold": predictor.threshold,
+                }
+                return wire_protocol.encode_response(request_id, json.dumps(schema).encode("utf-8"))
+            return self.score_feature_frame(request_id, model_type, predictor, n_features, n_rows, body)
         except Exception as e:
-            print(f"Error in prediction: {e}", file=sys.stderr)
-            return {"error": str(e)}
-    
-    def interpret_results(self, prediction_proba):
-        risk_probability = prediction_proba[0][1]  # Probability of molar pregnancy
-        
-        if risk_probability >= 0.7:
-            risk_level = "High"
-            recommendations = [
-                "URGENT: Immediate obstetric consultation required",
-                "Emergency referral to gynecologic oncology",
-                "Serial hCG monitoring every 24-48 hours",
-                "Comprehensive ultrasound examination",
-                "Prepare for possible evacuation procedure",
-                "Patient requires immediate specialized care",
-                "Baseline chest X-ray and laboratory workup"
-            ]
-        elif risk_probability >= 0.4:
-            risk_level = "Moderate"
-            recommendations = [
-                "Obstetric consultation within 24 hours",
-                "Serial hCG monitoring every 48-72 hours",
-                "Detailed ultrasound examination required",
-                "Consider tissue sampling if indicated",
-                "Close follow-up until hCG normalizes",
-                "Patient education on warning signs",
-                "Monitor for complications"
-            ]
+            return wire_protocol.encode_error(request_id, str(e))
+
+    def score_feature_frame(self, request_id, model_type, predictor, n_features, n_rows, body):
+        """Score packed float32 rows and return their packed results."""
+        import numpy as np
+
+        if n_rows == 0 or len(body) != n_rows * n_features * 4:
+            raise ValueError(f"Expected {n_rows} x {n_features} float32 values, got {len(body)} bytes")
+        profile = None
+        if predictor.profiler is not None:
+            profile = predictor.profiler.start(f"{model_type}/features", rows=n_rows)
+        features = np.frombuffer(body, dtype="<f4").reshape(n_rows, n_features)
+        probabilities = predictor.score_features(features, profile)
+        with stage(profile, "serialization"):
+            rows = np.empty(n_rows, dtype=wire_protocol.row_dtype())
+            rows["probability"] = probabilities
+            # NaN compares False, giving prediction 0 as on the JSON path
+            rows["prediction"] = probabilities > predictor.threshold
+            rows["riskBand"] = predictor.risk_bands.band_indices(probabilities)
+            response = wire_protocol.encode_response(
+                request_id, rows.tobytes(), fmt=wire_protocol.FORMAT_ROWS, n_rows=n_rows
+            )
+        if profile is not None:
+            profile.finish()
+        return response
+
+    def serve_binary(self, infile, outfile):
+        """Serve framed requests from binary ``infile`` until EOF; responses may arrive out of order."""
+        write_lock = threading.Lock()
+        in_flight = self.in_flight_limit()
+
+        def respond(payload):
+            try:
+                response = self.handle_frame(payload)
+                with write_lock:
+                    outfile.write(response)
+                    outfile.flush()
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                try:
+                    payload = wire_protocol.read_frame(infile)
+                except wire_protocol.ProtocolError as e:
+                    print(f"Closing binary stream: {e}", file=sys.stderr)
+                    break
+                if payload is None:
+                    break
+                in_flight.acquire()
+                executor.submit(respond, payload)
+
+    def serve_stdio(self, binary=False):
+        print("Predictor worker ready on stdin/stdout", file=sys.stderr)
+        if binary:
+            self.serve_binary(sys.stdin.buffer, sys.stdout.buffer)
         else:
-            risk_level = "Low"
-            recommendations = [
-                "Routine obstetric follow-up appropriate",
-                "Standard prenatal monitoring",
-                "Follow-up hCG as clinically indicated",
-                "Patient education on pregnancy symptoms",
-                "Monitor for any concerning changes"
-            ]
-        
-        return {
-            "riskLevel": risk_level,
-            "percentage": f"{risk_probability * 100:.1f}%",
-            "probability": float(risk_probability),
-            "recommendations": recommendations
+            self.serve(sys.stdin, sys.stdout)
+
+    def serve_unix_socket(self, socket_path, binary=False):
+        import socketserver
+
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                if binary:
+                    worker.serve_binary(self.rfile, self.wfile)
+                    return
+                reader = (line.decode("utf-8") for line in self.rfile)
+                writer = _SocketWriter(self.wfile)
+                worker.serve(reader, writer)
+
+        _remove_stale_socket(socket_path)
+        with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+            print(f"Predictor worker listening on {socket_path}", file=sys.stderr)
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(socket_path)
+
+def _remove_stale_socket(socket_path):
+    """Remove a socket left behind by a worker that is gone.
+
+    Exits with an error if the path is not a socket or a worker is still
+    listening on it, rather than deleting or taking it over.
+    """
+    import socket
+    import stat
+
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        sys.exit(f"Error: {socket_path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    sys.exit(f"Error: a worker is already listening on {socket_path}")
+
+class _SocketWriter:
+    """Text adapter over a socket's binary write file."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        self.wfile.flush()
+
+def run_worker(args):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="model_predictor.py worker")
+    parser.add_argument("--socket", help="Serve on this Unix socket instead of stdin/stdout")
+    parser.add_argument("--threads", type=int, default=4, help="Maximum requests processed concurrently")
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    parser.add_argument("--binary", action="store_true",
+                        help="Length-prefixed binary frames instead of JSON lines (see wire_protocol.py)")
+    options = parser.parse_args(args)
+
+    worker = PredictorWorker(options.models_dir, max_workers=options.threads)
+    if options.socket:
+        worker.serve_unix_socket(options.socket, binary=options.binary)
+    else:
+        worker.serve_stdio(binary=options.binary)
+
+def read_records(path, input_format=None):
+    """Yield ``(index, record, error)`` from a JSONL or CSV file, one line at a time.
+
+    Lines that are not valid JSON objects yield ``record=None`` and an error
+    message; ``-`` reads JSONL from stdin.
+    """
+    if input_format is None:
+        input_format = "csv" if str(path).lower().endswith(".csv") else "jsonl"
+    infile = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if input_format == "csv":
+            import csv
+            for index, row in enumerate(csv.DictReader(infile)):
+                yield index, row, None
+            return
+        index = 0
+        for line in infile:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Record must be a JSON object")
+                yield index, record, None
+            except ValueError as e:
+                yield index, None, f"Invalid record: {e}"
+            index += 1
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+
+def iter_chunks(records, chunk_size):
+    import itertools
+
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def score_chunk(predictor, chunk):
+    """Score one chunk of ``(index, record, error)`` into JSONL output lines.
+
+    Bad records keep their read error.
+    """
+    valid = [(index, record) for index, record, error in chunk if error is None]
+    scored = dict(zip(
+        (index for index, _ in valid),
+        predictor.predict_many([record for _, record in valid], as_json=True),
+    ))
+    return [
+        f'{{"index": {index}, "result": '
+        f'{scored[index] if error is None else json.dumps({"error": error})}}}\n'
+        for index, _, error in chunk
+    ]
+
+# Per-process predictor for score-file --processes
+_chunk_predictor = None
+
+def _init_chunk_worker(model_type, models_dir):
+    global _chunk_predictor
+    _chunk_predictor = create_predictor(model_type, models_dir)
+
+def _score_chunk_in_worker(chunk):
+    return score_chunk(_chunk_predictor, chunk)
+
+def score_chunks_in_processes(model_type, models_dir, chunks, processes):
+    """Score chunks on a process pool, yielding results in input order.
+
+    At most two chunks per process are in flight, so memory stays flat no
+    matter how large the input is.
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_chunk_worker,
+        initargs=(model_type, str(models_dir)),
+    ) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(_score_chunk_in_worker, chunk))
+            if len(in_flight) >= processes * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+def positive_int(value):
+    import argparse
+
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+def run_score_file(args):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="model_predictor.py score-file")
+    parser.add_argument("model_type", choices=sorted(MODEL_FILES))
+    parser.add_argument("input", help="JSONL or CSV file of form records, or - for JSONL on stdin")
+    parser.add_argument("--output", "-o", default="-", help="JSONL results file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from extension)")
+    parser.add_argument("--chunk-size", type=positive_int, default=1000)
+    parser.add_argument("--processes", type=positive_int, default=1, help="Score chunks in this many processes")
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    options = parser.parse_args(args)
+
+    # Checked here for both paths, so a missing model fails the run the same way
+    predictor = create_predictor(options.model_type, options.models_dir)
+    if predictor.model is None:
+        print(json.dumps({"error": "Model not loaded"}))
+        sys.exit(1)
+
+    chunks = iter_chunks(read_records(options.input, options.format), options.chunk_size)
+    if options.processes > 1:
+        predictor = None
+        scored_chunks = score_chunks_in_processes(
+            options.model_type, options.models_dir, chunks, options.processes
+        )
+    else:
+        scored_chunks = (score_chunk(predictor, chunk) for chunk in chunks)
+
+    outfile = sys.stdout if options.output == "-" else open(options.output, "w", encoding="utf-8")
+    count = 0
+    try:
+        for results in scored_chunks:
+            outfile.write("".join(results))
+            outfile.flush()
+            count += len(results)
+        print(f"Scored {count} records", file=sys.stderr)
+    except Exception as e:
+        # The output stops at the failing chunk, so the run must not look successful
+        print(f"Error: scoring stopped after {count} records: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
+
+# Heavy modules each predictor needs, in the order they get imported
+PREDICTOR_MODULES = {
+    "ectopic": ["numpy", "joblib", "sklearn"],
+    "molar": ["numpy", "joblib", "sklearn"],
+}
+if MODEL_ENGINE == "compiled":
+    PREDICTOR_MODULES = {"ectopic": ["numpy"], "molar": ["numpy"]}
+
+def run_self_test(model_types):
+    """Load each predictor, score an empty form twice and report timings as JSON.
+
+    Modules already imported for an earlier model type in the same process
+    report ~0 ms, so pass a single model type for isolated numbers.
+    """
+    import importlib
+
+    report = {}
+    started = time.perf_counter()
+    for model_type in model_types or list(MODEL_FILES):
+        if model_type not in MODEL_FILES:
+            report[model_type] = {"ok": False, "error": "Invalid model type"}
+            continue
+
+        imports_ms = {}
+        for module in PREDICTOR_MODULES[model_type]:
+            t0 = time.perf_counter()
+            importlib.import_module(module)
+            imports_ms[module] = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        predictor = create_predictor(model_type)
+        model_load_ms = (time.perf_counter() - t0) * 1000
+
+        predict_ms = []
+        result = None
+        for _ in range(2):
+            t0 = time.perf_counter()
+            result = predictor.predict({})
+            predict_ms.append((time.perf_counter() - t0) * 1000)
+
+        report[model_type] = {
+            "ok": predictor.model is not None and "error" not in result,
+            "imports_ms": imports_ms,
+            "model_load_ms": model_load_ms,
+            "first_predict_ms": predict_ms[0],
+            "second_predict_ms": predict_ms[1],
         }
+        if "error" in result:
+            report[model_type]["error"] = result["error"]
+
+    report["total_ms"] = (time.perf_counter() - started) * 1000
+    print(json.dumps(report))
+    if not all(entry["ok"] for key, entry in report.items() if key != "total_ms"):
+        sys.exit(1)
 
 def main():
+    # numpy is imported lazily, so the BLAS/OpenMP caps still apply here
+    limit_threads()
     try:
         # Read command line arguments
-        model_type = sys.argv[1]  # 'ectopic' or 'molar'
+        model_type = sys.argv[1]  # 'ectopic', 'molar', 'combined', 'worker', 'score-file' or '--self-test'
+
+        if model_type == "worker":
+            run_worker(sys.argv[2:])
+            return
+        if model_type == "score-file":
+            run_score_file(sys.argv[2:])
+            return
+        if model_type == "--self-test":
+            run_self_test(sys.argv[2:])
+            return
+
         input_data = json.loads(sys.argv[2])  # JSON string of form data
-        
-        # Get the project root directory
-        project_root = Path(__file__).parent.parent
-        models_dir = project_root / "models"
-        
-        if model_type == "ectopic":
-            model_path = models_dir / "ectopic_pregnancy_model.pkl"
-            predictor = EctopicPregnancyPredictor(model_path)
-        elif model_type == "molar":
-            model_path = models_dir / "molar_pregnancy_model.pkl"
-            predictor = MolarPregnancyPredictor(model_path)
-        else:
+
+        predictor = create_predictor(model_type)
+        if predictor is None:
             print(json.dumps({"error": "Invalid model type"}))
             return
         
         # Make prediction
-        result = predictor.predict(input_data)
-        print(json.dumps(result))
+        print(predictor.predict_json(input_data))
         
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+def file_signature(path):
+    """Return (mtime_ns, size) for ``path``, or None if it cannot be read."""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class PredictionCache:
+    """Bounded LRU/TTL cache of prediction results keyed on encoded features.
+
+    When ``model_path`` is given the file is re-checked at most every
+    ``check_interval`` seconds; if it changed, ``on_invalidate`` (e.g. the
+    predictor's ``load_model``) is called and then every entry is dropped.
+    ``generation`` increases on every clear; a ``put`` tagged with an older
+    generation was computed before the clear and is discarded.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, model_path=None,
+                 check_interval=1.0, on_invalidate=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.model_path = model_path
+        self.check_interval = check_interval
+        self.on_invalidate = on_invalidate
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._model_signature = file_signature(model_path)
+        self._next_check = time.monotonic() + check_interval
+
+    @staticmethod
+    def key(features):
+        """Hash an encoded feature row."""
+        row = np.asarray(features, dtype=np.float64).ravel()
+        return hashlib.blake2b(np.ascontiguousarray(row).tobytes(), digest_size=16).hexdigest()
+
+    def get(self, key):
+        self._check_model()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation=None):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+            }
+
+    def _check_model(self):
+        if self.model_path is None or time.monotonic() < self._next_check:
+            return
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            signature = file_signature(self.model_path)
+            if signature == self._model_signature:
+                return
+            self._model_signature = signature
+            self.invalidations += 1
+            # Swap the model in first: entries computed until the swap are
+            # dropped here, and later puts from the old model carry an old generation
+            if self.on_invalidate is not None:
+                self.on_invalidate()
+            self.clear()
+        finally:
+            self._check_lock.release()
+
+def cache_from_env(prefix="PREDICTION_CACHE", **kwargs):
+    """Build a cache from ``<prefix>_SIZE``/``<prefix>_TTL``; None when size is 0."""
+    max_size = int(os.getenv(f"{prefix}_SIZE", "1024"))
+    if max_size <= 0:
+        return None
+    ttl = float(os.getenv(f"{prefix}_TTL", "0")) or None
+    return PredictionCache(max_size=max_size, ttl=ttl, **kwargs)
@@ -0,0 +1,144 @@
+"""Opt-in per-request profiling for the predictor and the FastAPI routes.
+
+When enabled, every request records per-stage wall time, CPU time and, with
+tracemalloc, allocated and peak bytes. Only requests slower than
+``PROFILE_SLOW_MS`` or picked by ``PROFILE_SAMPLE_RATE`` are written out, as
+one JSON line each, to ``PROFILE_OUTPUT`` (default: stderr, since stdout
+carries predictor results).
+
+CPU time and allocations are process-wide, so with several requests in
+flight they include the others' work; wall times are always per request.
+When profiling is off the profiler is None and ``stage`` returns a shared
+no-op context, so callers pay one ``is None`` check per stage.
+
+    PROFILE_SLOW_MS=500 PROFILE_SAMPLE_RATE=0.01 PROFILE_OUTPUT=profiles.jsonl uvicorn main:app
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_NO_PROFILE = nullcontext()
+
+def stage(profile, name):
+    """``profile.stage(name)``, or a no-op context when profiling is off."""
+    if profile is None:
+        return _NO_PROFILE
+    return profile.stage(name)
+
+class RequestProfile:
+    """Stage measurements for one request; created by RequestProfiler.start."""
+
+    def __init__(self, profiler, name, sampled, context):
+        self.profiler = profiler
+        self.name = name
+        self.sampled = sampled
+        self.context = context
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self._mark = (self.started, self.started_cpu, self._traced())
+
+    def _traced(self):
+        return tracemalloc.get_traced_memory()[0] if self.profiler.trace_allocations else 0
+
+    def _record(self, name, start, start_cpu, start_traced, peak=None):
+        now, now_cpu, traced = time.perf_counter(), time.process_time(), self._traced()
+        entry = {
+            "wallMs": (now - start) * 1000,
+            "cpuMs": (now_cpu - start_cpu) * 1000,
+        }
+        if self.profiler.trace_allocations:
+            entry["allocBytes"] = traced - start_traced
+            if peak is not None:
+                entry["peakBytes"] = peak - start_traced
+        self.stages[name] = entry
+        self._mark = (now, now_cpu, traced)
+
+    @contextmanager
+    def stage(self, name):
+        if self.profiler.trace_allocations:
+            tracemalloc.reset_peak()
+        start, start_cpu, start_traced = time.perf_counter(), time.process_time(), self._traced()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] if self.profiler.trace_allocations else None
+            self._record(name, start, start_cpu, start_traced, peak)
+
+    def checkpoint(self, name):
+        """Record ``name`` as the span since the previous stage or checkpoint ended."""
+        self._record(name, *self._mark)
+
+    def finish(self, **context):
+        """Close the profile and write it out if it is slow or sampled."""
+        wall_ms = (time.perf_counter() - self.started) * 1000
+        slow = self.profiler.slow_ms is not None and wall_ms >= self.profiler.slow_ms
+        if not (slow or self.sampled):
+            return None
+        record = {
+            "ts": time.time(),
+            "name": self.name,
+            "reason": "slow" if slow else "sampled",
+            "wallMs": wall_ms,
+            "cpuMs": (time.process_time() - self.started_cpu) * 1000,
+            "stages": self.stages,
+            **self.context,
+            **context,
+        }
+        self.profiler.write(record)
+        return record
+
+class RequestProfiler:
+    """Starts request profiles and writes the ones worth keeping."""
+
+    def __init__(self, slow_ms=None, sample_rate=0.0, output=None, trace_allocations=True):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.output = output
+        self.trace_allocations = trace_allocations
+        self._lock = threading.Lock()
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls, prefix="PROFILE"):
+        """Build a profiler from ``<prefix>_*`` variables; None when profiling is off."""
+        slow_ms = os.getenv(f"{prefix}_SLOW_MS")
+        sample_rate = float(os.getenv(f"{prefix}_SAMPLE_RATE", "0"))
+        if not slow_ms and sample_rate <= 0:
+            return None
+        return cls(
+            slow_ms=float(slow_ms) if slow_ms else None,
+            sample_rate=sample_rate,
+            output=os.getenv(f"{prefix}_OUTPUT") or None,
+            trace_allocations=os.getenv(f"{prefix}_TRACEMALLOC", "1") != "0",
+        )
+
+    def start(self, name, **context):
+        return RequestProfile(self, name, random.random() < self.sample_rate, context)
+
+    def write(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self.output is None:
+                sys.stderr.write(line)
+                sys.stderr.flush()
+            else:
+                with open(self.output, "a") as f:
+                    f.write(line)
+
+_profiler_from_env = None
+_profiler_lock = threading.Lock()
+
+def profiler_from_env():
+    """Process-wide profiler configured from the environment (None when off)."""
+    global _profiler_from_env
+    with _profiler_lock:
+        if _profiler_from_env is None:
+            _profiler_from_env = (RequestProfiler.from_env(),)
+        return _profiler_from_env[0]
@@ -0,0 +1,153 @@
+"""Risk bands and pre-serialized result templates for interpret_results.
+
+Each model maps its positive-class probability onto a band (High, Moderate,
+Low) by configurable lower bounds. The JSON for each band's fixed fields is
+serialized once when the table is built. ``render`` only formats the
+per-request numbers and splices them in, and its output is byte-for-byte
+what ``json.dumps(interpret(...))`` would produce.
+
+Override the bounds with ``ECTOPIC_RISK_BANDS`` / ``MOLAR_RISK_BANDS``, e.g.
+``"0.7,0.4"`` for the High and Moderate lower bounds.
+"""
+import json
+import math
+import os
+
+RECOMMENDATIONS = {
+    "ectopic": {
+        "High": [
+            "Immediate gynecological consultation required",
+            "Emergency department evaluation recommended",
+            "Serial hCG monitoring every 12-24 hours",
+            "Urgent transvaginal ultrasound examination",
+            "Consider diagnostic laparoscopy if clinically indicated",
+            "Patient requires immediate medical attention"
+        ],
+        "Moderate": [
+            "Gynecological consultation within 24-48 hours",
+            "Serial hCG monitoring every 48 hours",
+            "Transvaginal ultrasound examination",
+            "Close clinical monitoring required",
+            "Patient education on warning signs",
+            "Follow-up appointment scheduled"
+        ],
+        "Low": [
+            "Routine obstetric follow-up appropriate",
+            "Standard prenatal care monitoring",
+            "Patient education on pregnancy symptoms",
+            "Follow-up as clinically indicated",
+            "Monitor for any concerning symptoms"
+        ],
+    },
+    "molar": {
+        "High": [
+            "URGENT: Immediate obstetric consultation required",
+            "Emergency referral to gynecologic oncology",
+            "Serial hCG monitoring every 24-48 hours",
+            "Comprehensive ultrasound examination",
+            "Prepare for possible evacuation procedure",
+            "Patient requires immediate specialized care",
+            "Baseline chest X-ray and laboratory workup"
+        ],
+        "Moderate": [
+            "Obstetric consultation within 24 hours",
+            "Serial hCG monitoring every 48-72 hours",
+            "Detailed ultrasound examination required",
+            "Consider tissue sampling if indicated",
+            "Close follow-up until hCG normalizes",
+            "Patient education on warning signs",
+            "Monitor for complications"
+        ],
+        "Low": [
+            "Routine obstetric follow-up appropriate",
+            "Standard prenatal monitoring",
+            "Follow-up hCG as clinically indicated",
+            "Patient education on pregnancy symptoms",
+            "Monitor for any concerning changes"
+        ],
+    },
+}
+
+# Lower probability bound of the High and Moderate bands
+DEFAULT_BOUNDS = (0.7, 0.4)
+
+def bounds_from_env(model_type):
+    value = os.getenv(f"{model_type.upper()}_RISK_BANDS")
+    if not value:
+        return DEFAULT_BOUNDS
+    high, moderate = (float(v) for v in value.split(","))
+    if not 0 <= moderate <= high <= 1:
+        raise ValueError(f"{model_type} risk bands must satisfy 0 <= moderate <= high <= 1: {value}")
+    return high, moderate
+
+class RiskBand:
+    def __init__(self, level, lower_bound, recommendations):
+        self.level = level
+        self.lower_bound = lower_bound
+        # Shared between results; callers must not mutate it
+        self.recommendations = list(recommendations)
+        self.level_json = json.dumps(level)
+        self.recommendations_json = json.dumps(self.recommendations)
+
+class RiskBandTable:
+    def __init__(self, model_type, bounds=None):
+        high, moderate = bounds or bounds_from_env(model_type)
+        recommendations = RECOMMENDATIONS[model_type]
+        self.model_type = model_type
+        # Ordered from the highest lower bound down
+        self.bands = [
+            RiskBand("High", high, recommendations["High"]),
+            RiskBand("Moderate", moderate, recommendations["Moderate"]),
+            RiskBand("Low", float("-inf"), recommendations["Low"]),
+        ]
+
+    def band(self, probability):
+        for band in self.bands:
+            if probability >= band.lower_bound:
+                return band
+        return self.bands[-1]
+
+    def band_indices(self, probabilities):
+        """Index into ``bands`` for each of an array of probabilities.
+
+        Matches ``band``: a probability on a lower bound belongs to that
+        band, and NaN falls in the last (Low) band.
+        """
+        import numpy as np
+
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        # Negated bounds ascend, so searchsorted counts the bands above each probability
+        negated_bounds = -np.array([band.lower_bound for band in self.bands[:-1]])
+        indices = np.searchsorted(negated_bounds, -probabilities, side="left")
+        indices[np.isnan(probabilities)] = len(self.bands) - 1
+        return indices
+
+    def interpret(self, probability, prediction):
+        band = self.band(probability)
+        return {
+            "prediction": int(prediction),
+            "riskLevel": band.level,
+            "percentage": f"{probability * 100:.1f}%",
+            "probability": float(probability),
+            "recommendations": band.recommendations,
+        }
+
+    def render(self, probability, prediction, proba=None, extra=""):
+        """JSON text of ``interpret(probability, prediction)``.
+
+        ``proba`` (the probability of the predicted class, as the API
+        reports it) is inserted after ``prediction`` when given. ``extra``
+        is pre-serialized members (``', "key": value'``) appended at the end.
+        """
+        band = self.band(probability)
+        probability = float(probability)
+        proba_json = "" if proba is None else f'"proba": {_number_json(proba)}, '
+        return (
+            f'{{"prediction": {int(prediction)}, {proba_json}"riskLevel": {band.level_json}, '
+            f'"percentage": "{probability * 100:.1f}%", "probability": {_number_json(probability)}, '
+            f'"recommendations": {band.recommendations_json}{extra}}}'
+        )
+
+def _number_json(value):
+    value = float(value)
+    return repr(value) if math.isfinite(value) else json.dumps(value)
@@ -0,0 +1,55 @@
+"""Cap the thread pools numpy's BLAS and OpenMP start in each process.
+
+Every BLAS/OpenMP runtime sizes its pool to all cores when it loads, so
+several backend workers (or inference processes) on one host oversubscribe
+the CPU. ``INFERENCE_NUM_THREADS`` sets the usual variables, unless they
+are already set explicitly, which only takes effect before numpy is
+imported; pools that are already running are limited through threadpoolctl
+(installed with scikit-learn) when it is available.
+"""
+import os
+import sys
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+def configured_threads():
+    """``INFERENCE_NUM_THREADS`` as an int, or None when unset."""
+    value = os.getenv("INFERENCE_NUM_THREADS")
+    if not value:
+        return None
+    threads = int(value)
+    if threads < 1:
+        raise ValueError(f"INFERENCE_NUM_THREADS must be at least 1: {value}")
+    return threads
+
+def limit_threads():
+    """Apply ``INFERENCE_NUM_THREADS``; returns the cap, or None when unset."""
+    threads = configured_threads()
+    if threads is None:
+        return None
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+    if "numpy" in sys.modules:
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(threads)
+        except ImportError:
+            print("numpy was imported before INFERENCE_NUM_THREADS was applied; its BLAS pool is unchanged", file=sys.stderr)
+    return threads
+
+def thread_pools():
+    """Loaded BLAS/OpenMP pools and their sizes, or None without threadpoolctl."""
+    try:
+        from threadpoolctl import threadpool_info
+    except ImportError:
+        return None
+    return [
+        {"api": info["internal_api"], "threads": info["num_threads"]}
+        for info in threadpool_info()
+    ]
@@ -0,0 +1,122 @@
+"""Length-prefixed binary framing for the predictor worker (``worker --binary``).
+
+Every message is a little-endian ``uint32`` byte length followed by that
+many bytes, so a client can pipeline requests on one stream and read the
+responses back by ``id``. A request is a 12-byte header followed by a body:
+
+    uint32 id | uint8 op | uint8 model | uint16 n_features | uint32 n_rows
+
+``model`` is 0 (ectopic), 1 (molar) or 2 (combined; forms only). ``op`` is:
+
+* ``OP_FORM`` (1): the body is the UTF-8 JSON form, scored exactly like a
+  text-protocol request; the response body is the same JSON result.
+* ``OP_FEATURES`` (2): the body is ``n_rows * n_features`` float32 values,
+  row-major, in the model's ``feature_names`` order. They go straight to
+  ``predict_proba`` with no form parsing or encoding, and the response
+  body is ``n_rows`` packed ``ROW_DTYPE`` records.
+* ``OP_SCHEMA`` (3): the response body is JSON with the model's
+  ``featureNames``, its ``riskLevels`` (indexed by ``riskBand`` in packed
+  rows) and its decision ``threshold``.
+
+A response is a 12-byte header followed by its body:
+
+    uint32 id | uint8 status | uint8 format | uint16 reserved | uint32 n_rows
+
+``status`` is 0 on success and 1 on error (the body is then a JSON
+``{"error": ...}``); ``format`` is ``FORMAT_JSON`` or ``FORMAT_ROWS``.
+"""
+import json
+import struct
+
+FRAME = struct.Struct("<I")
+REQUEST_HEADER = struct.Struct("<IBBHI")
+RESPONSE_HEADER = struct.Struct("<IBBHI")
+
+OP_FORM = 1
+OP_FEATURES = 2
+OP_SCHEMA = 3
+
+MODEL_CODES = {0: "ectopic", 1: "molar", 2: "combined"}
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+FORMAT_JSON = 0
+FORMAT_ROWS = 1
+
+# Largest frame accepted; larger length prefixes are treated as a corrupt stream
+MAX_FRAME_BYTES = 64 << 20
+
+class ProtocolError(Exception):
+    """Raised for frames that cannot be decoded."""
+
+def row_dtype():
+    """numpy dtype of one packed result row (6 bytes, no padding)."""
+    import numpy as np
+    return np.dtype([("probability", "<f4"), ("prediction", "u1"), ("riskBand", "u1")])
+
+# ---------- FRAMING ----------
+def read_exactly(infile, size):
+    """Read ``size`` bytes, or return None at a clean end of stream."""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = infile.read(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ProtocolError(f"Stream ended {remaining} bytes into a {size}-byte read")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+def read_frame(infile):
+    """Return the next frame's payload, or None at end of stream."""
+    prefix = read_exactly(infile, FRAME.size)
+    if prefix is None:
+        return None
+    (length,) = FRAME.unpack(prefix)
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES}-byte limit")
+    payload = read_exactly(infile, length)
+    if payload is None:
+        raise ProtocolError("Stream ended after a frame length prefix")
+    return payload
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+# ---------- MESSAGES ----------
+def encode_request(request_id, op, model, body=b"", n_features=0, n_rows=0):
+    return frame(REQUEST_HEADER.pack(request_id, op, model, n_features, n_rows) + body)
+
+def encode_features_request(request_id, model, features):
+    """Frame an OP_FEATURES request for a (n_rows, n_features) array."""
+    import numpy as np
+    features = np.ascontiguousarray(features, dtype="<f4")
+    if features.ndim == 1:
+        features = features.reshape(1, -1)
+    n_rows, n_features = features.shape
+    return encode_request(request_id, OP_FEATURES, model, features.tobytes(), n_features, n_rows)
+
+def decode_request(payload):
+    """Return ``(request_id, op, model, n_features, n_rows, body)``."""
+    if len(payload) < REQUEST_HEADER.size:
+        raise ProtocolError(f"Request of {len(payload)} bytes is shorter than its header")
+    header = REQUEST_HEADER.unpack_from(payload)
+    return (*header, memoryview(payload)[REQUEST_HEADER.size:])
+
+def encode_response(request_id, body, status=STATUS_OK, fmt=FORMAT_JSON, n_rows=0):
+    return frame(RESPONSE_HEADER.pack(request_id, status, fmt, 0, n_rows) + body)
+
+def encode_error(request_id, message):
+    return encode_response(request_id, json.dumps({"error": message}).encode("utf-8"), STATUS_ERROR)
+
+def decode_response(payload):
+    """Return ``(request_id, result)``: parsed JSON, or a structured array of rows."""
+    request_id, status, fmt, _, n_rows = RESPONSE_HEADER.unpack_from(payload)
+    body = payload[RESPONSE_HEADER.size:]
+    if fmt == FORMAT_ROWS:
+        import numpy as np
+        return request_id, np.frombuffer(body, dtype=row_dtype(), count=n_rows)
+    return request_id, json.loads(body)